@@ -1,40 +1,271 @@
+import json
 import os
-import pdfplumber
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-def extract_text_from_pdf(input_dir: str, output_dir: str) -> None:
+from build_manifest import BuildManifest, hash_config
+from pdf_backends import backend_config, get_backend
+
+PDF_STAGE = "pdf_to_txt"
+PDF_CONFIG = {"page_separator": "\n"}
+PDF_BACKEND = "pdfplumber"           # Text extractor: "pdfplumber", "pdfminer" or "pypdfium2"
+PDF_WORKERS = os.cpu_count() or 1    # Worker processes for PDF extraction (1 = no pool)
+
+
+def _isolated_call(func, args):
+    """Runs func(*args) and returns (result, error) instead of raising, so one bad file can't abort a batch."""
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+
+
+def _call_in_own_process(func, args):
+    """Runs one job in a pool of its own, so a worker that dies only fails this job."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(_isolated_call, func, args).result()
+        except BrokenProcessPool as e:
+            return None, f"BrokenProcessPool: the worker process died (crash or out of memory): {e}"
+
+
+def run_isolated(func, jobs, max_workers: int = PDF_WORKERS) -> list:
+    """
+    Runs func over a list of argument tuples in a process pool, isolating failures per job.
+
+    A worker killed outright (segfault, OOM killer) breaks the whole pool and every job still
+    running or queued in it; those jobs are then retried one process each, so only the job
+    that kills its worker is reported as failed.
+
+    Parameters:
+        func: Top-level (picklable) function to run.
+        jobs (list[tuple]): Arguments of each call.
+        max_workers (int): Number of worker processes; 1 runs everything in this process.
+
+    Returns:
+        list[tuple]: One (result, error) pair per job, in the order of jobs.
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [_isolated_call(func, args) for args in jobs]
+
+    results = [None] * len(jobs)
+    unfinished = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_isolated_call, func, args) for args in jobs]
+        for i, future in enumerate(futures):
+            try:
+                results[i] = future.result()
+            except BrokenProcessPool:
+                unfinished.append(i)
+            except Exception as e:  # e.g. a result that can't be pickled back
+                results[i] = None, f"{type(e).__name__}: {e}"
+
+    if unfinished:
+        print(f"⚠️ A worker process died; retrying {len(unfinished)} unfinished job(s) one process each")
+    for i in unfinished:
+        results[i] = _call_in_own_process(func, jobs[i])
+    return results
+
+
+def print_extraction_summary(files: int, pages: int | None, elapsed: float, failures: list) -> None:
+    """Prints the throughput of an extraction batch and the files that failed."""
+    elapsed = max(elapsed, 1e-9)
+    summary = f"📊 {files} file(s) in {elapsed:.1f}s — {files / elapsed:.2f} files/s"
+    if pages is not None:
+        summary += f", {pages} page(s), {pages / elapsed:.2f} pages/s"
+    print(summary)
+
+    for filename, error in failures:
+        print(f"❌ Failed: {filename} — {error.splitlines()[0]}")
+
+
+def iter_pdf_pages(pdf_path: str, start_page: int = 0, backend: str = PDF_BACKEND):
+    """
+    Yields (page_number, text) for each page of a PDF, one page at a time.
+    Each page's cached layout objects are released as soon as its text is extracted,
+    so memory stays bounded by a single page.
+
+    Parameters:
+        pdf_path (str): Path to the PDF file.
+        start_page (int): Index of the first page to extract (used to resume).
+        backend (str): Text extractor to use (see pdf_backends.BACKENDS).
+    """
+    yield from get_backend(backend)(pdf_path, start_page)
+
+
+def _source_stamp(pdf_path: str, backend: str) -> dict:
+    stat = os.stat(pdf_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "backend": backend}
+
+
+def _load_progress(progress_path: str, partial_path: str, stamp: dict) -> tuple[int, int]:
+    """
+    Returns (pages_done, byte_offset) of an interrupted extraction of the same PDF,
+    or (0, 0) if there is nothing valid to resume.
+    """
+    if not (os.path.exists(progress_path) and os.path.exists(partial_path)):
+        return 0, 0
+    try:
+        with open(progress_path, "r", encoding="utf-8") as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return 0, 0
+
+    if progress.get("source") != stamp or os.path.getsize(partial_path) < progress.get("offset", 0):
+        return 0, 0
+    return progress["pages_done"], progress["offset"]
+
+
+def _save_progress(progress_path: str, stamp: dict, pages_done: int, offset: int) -> None:
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"source": stamp, "pages_done": pages_done, "offset": offset}, f)
+    os.replace(tmp_path, progress_path)
+
+
+def extract_pdf_to_txt(pdf_path: str, output_path: str, backend: str = PDF_BACKEND) -> int:
+    """
+    Extracts the text of one PDF into a .txt file, page by page, and returns its number of pages.
+
+    Pages are appended to "<output>.partial" as they are extracted and every completed page is
+    recorded in "<output>.progress", so an interrupted extraction resumes after the last completed
+    page (unless the PDF or the backend changed in between). The .txt only appears once every page is written.
+    Pages are separated by a single newline, as with "\n".join over all pages.
+    """
+    partial_path = f"{output_path}.partial"
+    progress_path = f"{output_path}.progress"
+    stamp = _source_stamp(pdf_path, backend)
+
+    pages_done, offset = _load_progress(progress_path, partial_path, stamp)
+    if pages_done:
+        print(f"⏯️ Resuming {os.path.basename(pdf_path)} at page {pages_done + 1}")
+
+    # Binary mode so the progress offset is an exact byte position; newlines are translated
+    # like a text-mode write would
+    with open(partial_path, "r+b" if pages_done else "wb") as f:
+        f.seek(offset)
+        f.truncate()  # Drop anything written after the last recorded page
+
+        for number, text in iter_pdf_pages(pdf_path, start_page=pages_done, backend=backend):
+            if number:
+                text = "\n" + text
+            f.write(text.replace("\n", os.linesep).encode("utf-8"))
+            f.flush()
+            pages_done = number + 1
+            _save_progress(progress_path, stamp, pages_done, f.tell())
+
+    os.replace(partial_path, output_path)
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    return pages_done
+
+
+def extract_text_from_pdf(input_dir: str, output_dir: str, max_workers: int = PDF_WORKERS,
+                          backend: str = PDF_BACKEND) -> None:
     """
     Extracts raw text from all PDF files in the input_dir and saves them
-    as .txt files in the output_dir — skipping files that already exist.
-    
+    as .txt files in the output_dir — skipping PDFs whose content was already
+    extracted (tracked by content hash in the build manifest, so a replaced
+    PDF is extracted again) and extracting exact-duplicate PDFs only once.
+
+    PDFs are extracted concurrently in a process pool; a corrupt PDF is reported
+    and skipped without aborting the rest of the batch. Each PDF is streamed to
+    disk page by page and an interrupted extraction resumes where it stopped.
+
     Parameters:
         input_dir (str): Directory containing PDF files.
         output_dir (str): Directory to save extracted raw text files.
+        max_workers (int): Number of worker processes (1 disables the pool).
+        backend (str): Text extractor to use; switching backends re-extracts every PDF.
     """
     os.makedirs(input_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
 
-    files = os.listdir(input_dir)
+    files = sorted(os.listdir(input_dir))
     if not files:
         print(f"⚠️ No PDF files found in '{input_dir}'")
         return
 
+    manifest = BuildManifest()
+    get_backend(backend)  # Fail fast on an unknown or missing backend
+    config_hash = hash_config({**PDF_CONFIG, **backend_config(backend)})
+
+    pending = []        # (pdf_path, output_path, inputs) of the PDFs to extract or copy
     for filename in files:
         if not filename.lower().endswith(".pdf"):
             print(f"⏭️ Skipping non-PDF file: {filename}")
             continue
 
+        pdf_path = os.path.join(input_dir, filename)
         base_name = os.path.splitext(filename)[0]
         output_path = os.path.join(output_dir, f"{base_name}.txt")
 
-        if os.path.exists(output_path):
-            print(f"✅ Skipping existing file: {output_path}")
+        inputs = manifest.input_hashes([pdf_path])
+        if manifest.is_up_to_date(PDF_STAGE, pdf_path, inputs, config_hash):
+            print(f"✅ Skipping unchanged file: {output_path}")
+            continue
+        pending.append((pdf_path, output_path, inputs))
+
+    # Outputs of earlier runs can be copied only if they are intact and nothing in this run rewrites them
+    rewritten = {output_path for _, output_path, _ in pending}
+    extracted = {
+        pdf_hash: path
+        for pdf_hash, path in manifest.outputs_by_input_hash(PDF_STAGE, config_hash).items()
+        if path not in rewritten
+    }
+    queued = {}         # PDF hash -> output of the job extracting it in this run
+
+    jobs = []           # (pdf_path, output_path, backend) to extract
+    job_inputs = []     # Manifest input hashes of each job
+    duplicates = []     # (pdf_path, output_path, inputs) with the same content as another PDF
+
+    for pdf_path, output_path, inputs in pending:
+        pdf_hash = inputs[pdf_path]
+        if pdf_hash in queued or pdf_hash in extracted:
+            duplicates.append((pdf_path, output_path, inputs))
             continue
 
-        print(f"📄 Processing: {filename}")
-        with pdfplumber.open(os.path.join(input_dir, filename)) as pdf:
-            raw_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        print(f"📄 Queued: {os.path.basename(pdf_path)}")
+        queued[pdf_hash] = output_path
+        jobs.append((pdf_path, output_path, backend))
+        job_inputs.append(inputs)
+
+    start = time.perf_counter()
+    results = run_isolated(extract_pdf_to_txt, jobs, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+
+    total_pages = 0
+    failures = []
+    failed_hashes = set()
+
+    try:
+        for (pdf_path, output_path, _), inputs, (pages, error) in zip(jobs, job_inputs, results):
+            if error:
+                failures.append((pdf_path, error))
+                failed_hashes.add(inputs[pdf_path])
+                continue
+
+            total_pages += pages
+            print(f"✅ Saved to: {output_path}")
+            manifest.record(PDF_STAGE, pdf_path, inputs, config_hash, [output_path])
+
+        for pdf_path, output_path, inputs in duplicates:
+            pdf_hash = inputs[pdf_path]
+            if pdf_hash in failed_hashes:
+                failures.append((pdf_path, "Same content as a PDF that failed to extract"))
+                continue
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(raw_text)
+            # A copy of this run's extraction when there is one, else of an intact earlier output
+            source_path = queued.get(pdf_hash) or extracted[pdf_hash]
+            if source_path != output_path:
+                shutil.copyfile(source_path, output_path)
+            print(f"♻️ Same content as {source_path}, reused for: {output_path}")
+            manifest.record(PDF_STAGE, pdf_path, inputs, config_hash, [output_path])
+    finally:
+        manifest.save()
 
-        print(f"✅ Saved to: {output_path}")
+    print_extraction_summary(len(jobs), total_pages, elapsed, failures)
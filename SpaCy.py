@@ -3,15 +3,26 @@ import spacy
 from spacy.pipeline import EntityRuler
 from spacy import displacy
 from collections import defaultdict
-from spacy.tokens import Doc
+from spacy.tokens import Doc, Span
 from typing import List, Dict
 import json
 
+from doc_cache import DocCache
+from html_report import HtmlReportWriter, write_index
+from memory_budget import MEMORY, PiecedText, entities
+from nlp_pipeline import get_nlp, pipe_txt_files
+from profiler import PROFILER
+from prefilter import MONTHS, SECRETARIA, SUMARIO, Prefilter, keywords
+
 
 
 # === CONFIG ===
 INPUT_DIR = "raw_TXT"
 OUTPUT_DIR = "html_TEST"
+BATCH_SIZE = 4    # Gazettes per nlp.pipe batch
+N_PROCESS = 1     # Worker processes for nlp.pipe (-1 = all cores)
+USE_DOC_CACHE = True    # Reuse cached annotations from doc_cache/ when text and pipeline are unchanged
+WRITE_HTML = False      # Write an entity HTML per gazette; entity_viewer.py renders them on request instead
 ENTITY_PATTERNS = [
     {"label": "SUM", "pattern": [{"TEXT": "Sumário"}, {"TEXT": ":", "OP": "!"}]},
     {"label": "TEXTO", "pattern": "Texto"},
@@ -70,6 +81,34 @@ def extract_text_between_labels(doc, start_label: str, end_label: str) -> str |
 
     return None
 
+def extract_span_between_labels(doc, start_label: str, end_label: str) -> Span | None:
+    """
+    Returns the window of an already-parsed document between the first occurrence of two
+    labeled entities, so it can be sectioned without running the pipeline again.
+
+    Parameters:
+        doc (spacy.tokens.Doc): The processed spaCy document.
+        start_label (str): The entity label that marks the start of the span.
+        end_label (str): The entity label that marks the end of the span.
+
+    Returns:
+        spacy.tokens.Span | None: The span between the two entities (excluding them),
+                                  or None if either label is not found in the expected order.
+    """
+    start, end = None, None
+
+    for ent in doc.ents:
+        if ent.label_ == start_label and start is None:
+            start = ent.end
+        elif ent.label_ == end_label and start is not None:
+            end = ent.start
+            break
+
+    if start is not None and end is not None:
+        return doc[start:end]
+
+    return None
+
 def extract_text_between_labels_including_start(doc, start_label: str, end_label: str) -> str | None:
     """
     Extracts the text span starting from the first occurrence of a labeled entity 
@@ -128,7 +167,8 @@ def group_sections_by_secretaria_with_metadata(extracted_doc) -> dict:
     within a pre-extracted portion of the document.
 
     Parameters:
-        extracted_doc (spacy.tokens.Doc): The doc span containing SECRETARIA and DES entities.
+        extracted_doc (spacy.tokens.Doc | spacy.tokens.Span): The doc or doc window containing
+                                                              SECRETARIA and DES entities.
 
     Returns:
         dict: A nested dictionary where each key is a SECRETARIA entity text, and each value is
@@ -138,6 +178,11 @@ def group_sections_by_secretaria_with_metadata(extracted_doc) -> dict:
     current_secretaria = None
     current_sections = []
 
+    # Work on a window of the original Doc: entity offsets are doc-relative
+    if isinstance(extracted_doc, Doc):
+        extracted_doc = extracted_doc[:]
+    doc = extracted_doc.doc
+
     des_ents = [ent for ent in extracted_doc.ents if ent.label_ == "DES"]
     secretaria_ents = [ent for ent in extracted_doc.ents if ent.label_ == "SECRETARIA"]
 
@@ -164,8 +209,8 @@ def group_sections_by_secretaria_with_metadata(extracted_doc) -> dict:
 
         elif ent.label_ == "DES" and current_secretaria:
             start = ent.start
-            end = all_ents[i + 1].start if i + 1 < len(all_ents) else len(extracted_doc)
-            span = extracted_doc[start:end]
+            end = all_ents[i + 1].start if i + 1 < len(all_ents) else extracted_doc.end
+            span = doc[start:end]
             current_sections.append({
                 "title": ent.text,
                 "text": span.text.replace(current_secretaria, "").strip()
@@ -215,52 +260,60 @@ def save_secretaria_dict_to_json(secretaria_dict, txt_filename, output_dir):
 # === Setup ===
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-nlp = spacy.load("pt_core_news_lg")
-ruler = nlp.add_pipe("entity_ruler", before="ner")
-ruler.add_patterns(ENTITY_PATTERNS)
+nlp = get_nlp("pt_core_news_lg", [("entity_ruler", ENTITY_PATTERNS)], profile="full")
+parser = DocCache(nlp) if USE_DOC_CACHE else nlp
 
-# === Process and Save HTML ===
-for filename in os.listdir(INPUT_DIR):
-    if not filename.endswith(".txt"):
-        continue
+# A document needs the marker of at least one of the ENTITY_PATTERNS labels to be rendered
+prefilter = Prefilter("entity HTML", require_any=[SUMARIO, r"Texto", keywords("despacho"), keywords(*MONTHS), SECRETARIA])
 
-    filepath = os.path.join(INPUT_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        text = f.read()
-
-    doc = nlp(text)
-    if not any(ent.label_ in {"SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA"} for ent in doc.ents):
+# === Process and Save HTML ===
+for doc, filename in pipe_txt_files(parser, INPUT_DIR, batch_size=BATCH_SIZE, n_process=N_PROCESS, prefilter=prefilter):
+    if not any(ent.label_ in {"SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA"} for ent in entities(doc)):
         print(f"❌ No custom entities in: {filename}")
         continue
+    if not WRITE_HTML:
+        continue
 
 #-----------------------------------------------------------------------------------------
-    html = displacy.render(
-        doc,
-        style="ent",
-        options={
-            "ents": ["SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA"],
-            "colors": {
-                "SUM": "#ff6f61",       # soft red
-                "TEXTO": "#6a9fb5",     # soft blue
-                "DES": "#88c057",        # soft green
-                "HEADER_DATE": "#88c555"       
-            }
-        },
-        page=True
-    )
-
-
     output_path = os.path.join(OUTPUT_DIR, f"{os.path.splitext(filename)[0]}.html")
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    with MEMORY.track(filename, "render"), HtmlReportWriter(output_path, filename) as report:
+        report.heading(filename)
+        # An over-budget text is rendered one piece at a time
+        parts = (piece for piece, _ in doc.pieces()) if isinstance(doc, PiecedText) else [doc]
+        for part in parts:
+            # displacy escapes the document text itself
+            report.raw(displacy.render(
+                part,
+                style="ent",
+                options={
+                    "ents": ["SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA"],
+                    "colors": {
+                        "SUM": "#ff6f61",       # soft red
+                        "TEXTO": "#6a9fb5",     # soft blue
+                        "DES": "#88c057",        # soft green
+                        "HEADER_DATE": "#88c555"       
+                    }
+                },
+            ))
 
     print(f"✅ HTML saved to: {output_path}")
 #------------------------------------------------------------------------------------------
 
-extracted = extract_text_between_labels(doc, "SUM", "HEADER_DATE")
-extracted_doc = nlp(extracted)
-
-secretaria_dict = group_sections_by_secretaria_with_metadata(extracted_doc)
+for filename in prefilter.rejected:
+    print(f"❌ No custom entities in: {filename}")
+print(prefilter.report())
+if WRITE_HTML:
+    write_index(OUTPUT_DIR, "Entity reports")
+PROFILER.save_report()
+MEMORY.save_report()
+
+# Section the sumário window of the same Doc instead of parsing it a second time
+if isinstance(doc, PiecedText):
+    extracted_span = doc.window("SUM", "HEADER_DATE")
+else:
+    extracted_span = extract_span_between_labels(doc, "SUM", "HEADER_DATE")
+
+secretaria_dict = group_sections_by_secretaria_with_metadata(extracted_span)
 
 save_secretaria_dict_to_json(secretaria_dict, filename, output_dir="json_exports")
 
@@ -3,12 +3,32 @@ import spacy
 from spacy.pipeline import EntityRuler
 import json
 from spacy import displacy
-
-from clean_people_chunk import extract_people_from_chunk
+from spacy.tokens import Doc, Span
+from datetime import datetime
+
+from build_manifest import BuildManifest, hash_config
+from clean_people_chunk import (
+    NAME_TITLES,
+    TRIM_KEYWORDS,
+    UNWANTED_WORDS,
+    extract_people_from_chunk,
+    extract_people_from_chunks,
+)
+from doc_cache import DocCache
+from memory_budget import MEMORY, PiecedText, entities
+from nlp_pipeline import get_nlp, pipe_txt_files
+from profiler import PROFILER
+from prefilter import CORRESPONDENCIA, NUMERO, SUMARIO, Prefilter, keywords
+from section_export import SUMARIO_JSONL_DIR, jsonl_shard_path, remove_stale_outputs, section_record, write_jsonl_records
+from section_store import SectionStore
 
 # === CONFIG ===
 INPUT_DIR = "raw_TXT"
 OUTPUT_DIR = "json_exports"
+BATCH_SIZE = 4    # Gazettes per nlp.pipe batch
+N_PROCESS = 1     # Worker processes for nlp.pipe (-1 = all cores)
+USE_DOC_CACHE = True    # Reuse cached annotations from doc_cache/ when text and pipeline are unchanged
+EXPORT_MODES = ("json", "jsonl", "sqlite")    # "json": nested file per gazette; "jsonl": one flat record per despacho; "sqlite": section_store.py
 
 # === Custom Entity Patterns ===
 PRIMARY_PATTERNS = [
@@ -154,7 +174,11 @@ def extract_metadata_from_chunk(chunk: str, autor_mode=True):
         "pessoas": [] if autor_mode else people
     }
 
-def extract_text_between_labels(doc, start_label: str, end_label: str) -> str | None:
+def extract_span_between_labels(doc, start_label: str, end_label: str) -> Span | None:
+    """
+    Returns the window of the already-parsed doc between the first start_label entity
+    and the next end_label entity (both excluded), without re-running the pipeline.
+    """
     start, end = None, None
     for ent in doc.ents:
         if ent.label_ == start_label and start is None:
@@ -162,13 +186,39 @@ def extract_text_between_labels(doc, start_label: str, end_label: str) -> str |
         elif ent.label_ == end_label and start is not None:
             end = ent.start
             break
-    return doc[start:end].text.strip() if start is not None and end is not None else None
+    return doc[start:end] if start is not None and end is not None else None
+
+def extract_text_between_labels(doc, start_label: str, end_label: str) -> str | None:
+    span = extract_span_between_labels(doc, start_label, end_label)
+    return span.text.strip() if span is not None else None
+
+def build_secretaria_entries(secretaria, sections, people) -> dict:
+    return {
+        sec["title"]: {
+            "chunk": sec["text"],
+            "data": "",
+            "autor": autor,
+            "pessoas": [],
+            "despacho":sec["title"],
+            "despachos": [],
+            "serie": "",
+            "secretaria":secretaria,
+            "PDF":"",
+        }
+        for sec, autor in zip(sections, people)
+    }
 
+@PROFILER.profiled("group_sections")
 def group_sections_by_secretaria_with_metadata(extracted_doc) -> dict:
-    result = {}
+    blocks = []
     current_secretaria = None
     current_sections = []
 
+    # Work on a window of the original Doc: entity offsets are doc-relative
+    if isinstance(extracted_doc, Doc):
+        extracted_doc = extracted_doc[:]
+    doc = extracted_doc.doc
+
     des_ents = [ent for ent in extracted_doc.ents if ent.label_ == "DES"]
     secretaria_ents = [ent for ent in extracted_doc.ents if ent.label_ == "SECRETARIA"]
 
@@ -177,47 +227,30 @@ def group_sections_by_secretaria_with_metadata(extracted_doc) -> dict:
     for i, ent in enumerate(all_ents):
         if ent.label_ == "SECRETARIA":
             if current_secretaria and current_sections:
-                result[current_secretaria] = {
-                    sec["title"]: {
-                        "chunk": sec["text"],
-                        "data": "",
-                        "autor": extract_people_from_chunk(sec["text"]),
-                        "pessoas": [],
-                        "despacho":sec["title"],
-                        "despachos": [],
-                        "serie": "",
-                        "secretaria":current_secretaria,
-                        "PDF":"",
-                    }
-                    for sec in current_sections
-                }
+                blocks.append((current_secretaria, current_sections))
             current_secretaria = ent.text
             current_sections = []
 
         elif ent.label_ == "DES" and current_secretaria:
             start = ent.start
-            end = all_ents[i + 1].start if i + 1 < len(all_ents) else len(extracted_doc)
-            span = extracted_doc[start:end]
+            end = all_ents[i + 1].start if i + 1 < len(all_ents) else extracted_doc.end
+            span = doc[start:end]
             current_sections.append({
                 "title": ent.text,
                 "text": span.text.replace(current_secretaria, "").strip()
             })
 
     if current_secretaria and current_sections:
-        result[current_secretaria] = {
-            sec["title"]: {
-                "chunk": sec["text"],
-                "data": "",
-                "autor": extract_people_from_chunk(sec["text"]),
-                "pessoas": [],
-                "despacho":sec["title"],
-                "despachos": [],
-                "serie": "",
-                "secretaria":current_secretaria,
-                "PDF":"",
-            }
-            for sec in current_sections
-        }
+        blocks.append((current_secretaria, current_sections))
+
+    # One batched NER run for every despacho of the document
+    people = extract_people_from_chunks([sec["text"] for _, sections in blocks for sec in sections])
+
+    result = {}
+    offset = 0
+    for secretaria, sections in blocks:
+        result[secretaria] = build_secretaria_entries(secretaria, sections, people[offset:offset + len(sections)])
+        offset += len(sections)
 
     return result
 
@@ -228,44 +261,134 @@ def save_secretaria_dict_to_json(secretaria_dict, txt_filename, output_dir):
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(secretaria_dict, f, ensure_ascii=False, indent=2)
     print(f"✅ JSON saved to: {json_path}")
+    return json_path
 
 # === Setup NLP ===
-nlp = spacy.load("pt_core_news_lg")
-
-# Add composed/override patterns first
-ruler_composed = nlp.add_pipe("entity_ruler", name="ruler_composed", before="ner")
-ruler_composed.add_patterns(COMPOSED_PATTERNS)
+# Composed/override patterns first, general/primary patterns second
+SECTIONING_RULERS = [
+    ("ruler_composed", COMPOSED_PATTERNS),
+    ("ruler_primary", PRIMARY_PATTERNS),
+]
 
-# Add general/primary patterns second
-ruler_primary = nlp.add_pipe("entity_ruler", name="ruler_primary", after="ruler_composed")
-ruler_primary.add_patterns(PRIMARY_PATTERNS)
+# === Build Manifest ===
+# Everything that changes a stage's output; editing any of it reprocesses every file
+SECTIONS_STAGE = "sumario_sections"
+SECTIONS_CONFIG = {
+    "model": "pt_core_news_lg",
+    "rulers": SECTIONING_RULERS,
+    "trim_keywords": TRIM_KEYWORDS,
+    "unwanted_words": UNWANTED_WORDS,
+    "name_titles": NAME_TITLES,
+    "exports": list(EXPORT_MODES),
+}
+CLEANUP_STAGE = "raw_txt_cleanup"
+
+# === Pre-filter Markers ===
+# A sumário can only be sectioned with both a SUM and a SEC_DES_SUM entity
+SECTIONS_MARKERS = [SUMARIO, keywords("despacho", "aviso")]
+# Markers of the labels the cleanup acts on; a text with none of them is written unchanged
+CLEANUP_LABEL_MARKERS = {
+    "HEADER_DATE_CORRESPONDENCIA": CORRESPONDENCIA,
+    "HEADER_DATE": NUMERO,
+    "SEC_DES_SUM": SUMARIO,
+}
 
 
 # === Process All TXT Files ===
-for filename in os.listdir(INPUT_DIR):
-    if not filename.endswith(".txt"):
-        continue
-
-    filepath = os.path.join(INPUT_DIR, filename)
-    with open(filepath, "r", encoding="utf-8") as f:
-        text = f.read()
+def iter_section_records(secretaria_dict, original_filename, file_date):
+    """Yields one flat record per despacho of a secretaria dict, in document order."""
+    order = 0
+    for secretaria, entries in secretaria_dict.items():
+        for title, entry in entries.items():
+            order += 1
+            yield section_record(secretaria, title, entry["chunk"], entry["autor"], order, original_filename, file_date)
+
+def remove_doc_sections(filename, output_dir, file_date="", store=None):
+    """
+    Removes what a previous run exported for a gazette that no longer has a usable sumário:
+    its JSON file, its JSONL shard and its rows of the SQLite section store.
+    """
+    original_filename = os.path.splitext(filename)[0]
+    remove_stale_outputs(os.path.join(output_dir, f"{original_filename}.json"),
+                         jsonl_shard_path(original_filename, SUMARIO_JSONL_DIR))
+    if "sqlite" in EXPORT_MODES and store is not None:
+        store.replace_gazette(original_filename, "sumario", [], file_date or None)
 
-    doc = nlp(text)
 
-    if not any(ent.label_ in {"SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA", "SEC_DES_SUM"} for ent in doc.ents):
+def export_doc_sections(doc, filename, output_dir, file_date="", store=None):
+    """
+    Saves the SECRETARIA/DES sections found in the sumário of a processed gazette, as a nested
+    JSON file, as flat JSONL records and/or as rows of the SQLite section store (see EXPORT_MODES).
+    Returns the paths written, or an empty list if the document has no usable sumário
+    (what a previous run exported for it is then removed, see remove_doc_sections).
+    """
+    original_filename = os.path.splitext(filename)[0]
+    if not any(ent.label_ in {"SUM", "TEXTO", "DES", "HEADER_DATE", "SECRETARIA", "SEC_DES_SUM"} for ent in entities(doc)):
         print(f"❌ No custom entities in: {filename}")
-        continue
-
-    extracted = extract_text_between_labels(doc, "SUM", "SEC_DES_SUM")
-    if not extracted:
+        remove_doc_sections(filename, output_dir, file_date, store)
+        return []
+
+    # Section the sumário window of the same Doc instead of parsing it a second time
+    # (an over-budget text only parses its pieces up to the end of the window, then the window itself)
+    if isinstance(doc, PiecedText):
+        extracted_span = doc.window("SUM", "SEC_DES_SUM")
+    else:
+        extracted_span = extract_span_between_labels(doc, "SUM", "SEC_DES_SUM")
+    if extracted_span is None or not extracted_span.text.strip():
         print(f"⚠️ Could not extract between SUM and SEC_DES_SUM in: {filename}")
-        continue
-
-    extracted_doc = nlp(extracted)
-    secretaria_dict = group_sections_by_secretaria_with_metadata(extracted_doc)
-
+        remove_doc_sections(filename, output_dir, file_date, store)
+        return []
+
+    secretaria_dict = group_sections_by_secretaria_with_metadata(extracted_span)
+
+    outputs = []
+    if "json" in EXPORT_MODES:
+        outputs.append(save_secretaria_dict_to_json(secretaria_dict, filename, output_dir=output_dir))
+    if "jsonl" in EXPORT_MODES:
+        records = iter_section_records(secretaria_dict, original_filename, file_date)
+        outputs.append(write_jsonl_records(records, original_filename, SUMARIO_JSONL_DIR))
+    if "sqlite" in EXPORT_MODES and store is not None:
+        records = [
+            {**record, "people_role": "autor"}
+            for record in iter_section_records(secretaria_dict, original_filename, file_date)
+        ]
+        store.replace_gazette(original_filename, "sumario", records, file_date)
+    return outputs
 
-    save_secretaria_dict_to_json(secretaria_dict, filename, output_dir=OUTPUT_DIR)
+def export_sumario_sections(input_dir, output_dir, batch_size=BATCH_SIZE, n_process=N_PROCESS):
+    """
+    Runs the .txt files whose content or configuration changed since the last run through
+    the sectioning pipeline in batches, and saves the sections of each sumário as JSON.
+    """
+    manifest = BuildManifest()
+    config_hash = hash_config(SECTIONS_CONFIG)
+    stale = manifest.stale_files(SECTIONS_STAGE, input_dir, ".txt", config_hash)
+    print(f"🔁 {len(stale)} new or changed file(s) to section in: {input_dir}")
+
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+    parser = DocCache(nlp) if USE_DOC_CACHE else nlp
+    prefilter = Prefilter("sumário sections", require_all=SECTIONS_MARKERS)
+    store = SectionStore() if "sqlite" in EXPORT_MODES else None
+
+    try:
+        for doc, filename in pipe_txt_files(parser, input_dir, filenames=stale, batch_size=batch_size,
+                                            n_process=n_process, prefilter=prefilter):
+            txt_path = os.path.join(input_dir, filename)
+            file_date = datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat()
+            with MEMORY.track(filename, "export_sections"):
+                outputs = export_doc_sections(doc, filename, output_dir, file_date, store)
+            manifest.record(SECTIONS_STAGE, txt_path, stale[filename], config_hash, outputs)
+
+        for filename in prefilter.rejected:
+            print(f"❌ No sumário markers in: {filename}")
+            remove_doc_sections(filename, output_dir, store=store)
+            manifest.record(SECTIONS_STAGE, os.path.join(input_dir, filename), stale[filename], config_hash)
+    finally:
+        manifest.save()
+        if store is not None:
+            store.close()
+
+    print(prefilter.report())
 
 #----------------------------------------------------------------------------- por noutro script ??? -----------------------------------------------------------------
 
@@ -310,44 +433,132 @@ def truncate_before_ent_keep_ent(doc, label):
     return doc.text
 
 
+def clean_text_reparse(nlp, doc, truncate_label=None, remove_label=None, truncate_label_before=None):
+    """
+    Reference implementation of the cleanup: applies each step on its own text and
+    re-runs the pipeline after every edit. Kept to check clean_text_single_pass against.
+    """
+    text = doc.text
+
+    # Truncate after entity
+    if truncate_label:
+        text = truncate_after_ent(doc, truncate_label)
+        doc = nlp(text)  # re-run NLP after truncation
+
+    # Remove entities
+    if remove_label:
+        text = remove_ent(doc, remove_label)
+        doc = nlp(text)
 
+    if truncate_label_before:
+        text = truncate_before_ent_keep_ent(doc, truncate_label_before)
 
-def process_txt_files(input_dir, output_dir, truncate_label=None, remove_label=None, truncate_label_before=None,):
+    return text
+
+
+@PROFILER.profiled("cleanup_edits")
+def clean_text_single_pass(nlp, doc, truncate_label=None, remove_label=None, truncate_label_before=None):
     """
-    Process .txt files: truncate after a given entity label and remove all occurrences of another.
-    Saves cleaned files to output_dir.
+    Same result as truncate_after_ent -> remove_ent -> truncate_before_ent_keep_ent,
+    computed from the entities of a single parse with character-offset arithmetic.
+    Also accepts the PiecedText of an over-budget text, whose pieces are parsed one at a time.
+
+    The truncate_before entity is looked up in a re-parse of the edited text: removing a
+    header can join the lines around it into a new match (e.g. a SEC_DES_SUM split by a
+    page header), so the offsets of the first parse are not enough there.
     """
-    os.makedirs(output_dir, exist_ok=True)
+    text = doc.text
+    ents = list(entities(doc))
+
+    # Truncate after entity: keep the tokens before the last truncate_label entity
+    cut = len(text)
+    if truncate_label:
+        matches = [ent for ent in ents if ent.label_ == truncate_label]
+        if matches:
+            last = matches[-1]
+            cut = last.prev_end_char
+            ents = [ent for ent in ents if ent.end_char <= last.start_char]
+
+    # Remove entities: keep the gaps between the removed character ranges
+    removed = []
+    if remove_label:
+        removed = [(ent.start_char, ent.end_char) for ent in ents if ent.label_ == remove_label]
+        ents = [ent for ent in ents if ent.label_ != remove_label]
+
+    pieces = []
+    pos = 0
+    for start_char, end_char in removed:
+        pieces.append(text[pos:start_char])
+        pos = end_char
+    pieces.append(text[pos:cut])
+    text = "".join(pieces)
+
+    # Truncate before entity: re-parse only if the edits changed the text
+    if truncate_label_before:
+        if text != doc.text:
+            ents = entities(PiecedText(nlp, text) if isinstance(doc, PiecedText) else nlp(text))
+        for ent in ents:
+            if ent.label_ == truncate_label_before:
+                return text[ent.start_char:].strip()
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".txt"):
-            input_path = os.path.join(input_dir, filename)
+    return text
 
-            with open(input_path, "r", encoding="utf-8") as f:
-                text = f.read()
 
-            doc = nlp(text)
+def process_txt_files(input_dir, output_dir, truncate_label=None, remove_label=None, truncate_label_before=None,
+                      batch_size=BATCH_SIZE, n_process=N_PROCESS):
+    """
+    Process .txt files: truncate after a given entity label and remove all occurrences of another.
+    Saves cleaned files to output_dir. Files whose content and labels are unchanged since
+    the last run are skipped.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
-            # Truncate after entity
-            if truncate_label:
-                text = truncate_after_ent(doc, truncate_label)
-                doc = nlp(text)  # re-run NLP after truncation
+    manifest = BuildManifest()
+    config_hash = hash_config({
+        "rulers": SECTIONING_RULERS,
+        "labels": [truncate_label, remove_label, truncate_label_before],
+    })
+    stale = manifest.stale_files(CLEANUP_STAGE, input_dir, ".txt", config_hash)
+    print(f"🔁 {len(stale)} new or changed file(s) to clean in: {input_dir}")
+
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+    parser = DocCache(nlp) if USE_DOC_CACHE else nlp
+
+    # Only screen when every label in use has a known marker
+    labels = [label for label in (truncate_label, remove_label, truncate_label_before) if label]
+    prefilter = None
+    if labels and all(label in CLEANUP_LABEL_MARKERS for label in labels):
+        prefilter = Prefilter("raw text cleanup", require_any=[CLEANUP_LABEL_MARKERS[label] for label in labels])
+
+    try:
+        for doc, filename in pipe_txt_files(parser, input_dir, filenames=stale, batch_size=batch_size,
+                                            n_process=n_process, prefilter=prefilter):
+            # The edits are computed from this parse, plus a re-parse for truncate_label_before
+            with MEMORY.track(filename, "cleanup"):
+                text = clean_text_single_pass(nlp, doc, truncate_label, remove_label, truncate_label_before)
 
-            # Remove entities
-            if remove_label:
-                text = remove_ent(doc, remove_label)
-                doc = nlp(text)
-            
-            # Replace this in your process_txt_files function
-            if truncate_label_before:
-                text = truncate_before_ent_keep_ent(doc, truncate_label_before)
-                doc = nlp(text)
+            output_path = os.path.join(output_dir, filename)
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(text)
 
+            manifest.record(CLEANUP_STAGE, os.path.join(input_dir, filename), stale[filename], config_hash, [output_path])
+
+        # None of the labels can occur in these texts, so the cleanup leaves them as they are
+        for filename in prefilter.rejected if prefilter else []:
+            with open(os.path.join(input_dir, filename), "r", encoding="utf-8") as f:
+                text = f.read()
 
             output_path = os.path.join(output_dir, filename)
             with open(output_path, "w", encoding="utf-8") as f:
                 f.write(text)
 
+            manifest.record(CLEANUP_STAGE, os.path.join(input_dir, filename), stale[filename], config_hash, [output_path])
+    finally:
+        manifest.save()
+
+    if prefilter:
+        print(prefilter.report())
+
 # === Configuration ===
 input_directory = "raw_TXT"
 output_directory = "raw_TXT_deleted"
@@ -358,13 +569,19 @@ label_to_remove = "HEADER_DATE"                           # Remove this entity f
 label_to_truncate_before = "SEC_DES_SUM"                  # Truncate everything before this entity (but keep it)
 
 # === Run Processing ===
-process_txt_files(
-    input_dir=input_directory,
-    output_dir=output_directory,
-    truncate_label=label_to_truncate_after,
-    remove_label=label_to_remove,
-    truncate_label_before=label_to_truncate_before
-)
+# Guarded so that nlp.pipe worker processes (n_process > 1) can import this module safely
+if __name__ == "__main__":
+    export_sumario_sections(INPUT_DIR, OUTPUT_DIR)
+
+    process_txt_files(
+        input_dir=input_directory,
+        output_dir=output_directory,
+        truncate_label=label_to_truncate_after,
+        remove_label=label_to_remove,
+        truncate_label_before=label_to_truncate_before
+    )
+    PROFILER.save_report()
+    MEMORY.save_report()
 
 
 
@@ -396,15 +613,8 @@ def generate_ner_html(txt_path: str, html_output_path: str, model_name: str = "p
     if not os.path.exists(txt_path):
         raise FileNotFoundError(f"File not found: {txt_path}")
 
-    # Load spaCy model and add your entity ruler
-    nlp = spacy.load(model_name)
-    # Add composed/override patterns first
-    ruler_composed = nlp.add_pipe("entity_ruler", name="ruler_composed", before="ner")
-    ruler_composed.add_patterns(COMPOSED_PATTERNS)
-
-    # Add general/primary patterns second
-    ruler_primary = nlp.add_pipe("entity_ruler", name="ruler_primary", after="ruler_composed")
-    ruler_primary.add_patterns(PRIMARY_PATTERNS)
+    # Reuse the shared pipeline with the entity rulers
+    nlp = get_nlp(model_name, SECTIONING_RULERS, profile="full")
 
 
     # Load and process the text
@@ -0,0 +1,77 @@
+import re
+import time
+
+from clean_people_chunk import NAME_TITLES
+from person_names import TitledNameMatcher
+
+# === Config ===
+SIZES = [1_000, 4_000, 16_000]    # Repetitions of each adversarial unit
+REPEATS = 3                       # Best of N timings
+
+NORMAL_CHUNKS = [
+    "Despacho n.º 464/2025\nNomeia a Licenciada Anabela de Sousa Reis Varela, Técnica Superior do\nSistema Centralizado de Gestão de Recursos Humanos.",
+    "Aviso n.º 139/2025\nAutoriza a renovação da comissão de serviço da Licenciada Ana Cristina Fernandes\nEscórcio, como Chefe de Divisão do Gabinete de Conferência e Conformidade.",
+    "Designa o Doutor Rui Miguel Gonçalves Freitas e a Mestre Carla Sofia Abreu como vogais do júri.",
+    "Nota curricular do Pós-Doutor João Pedro Nóbrega Câmara, Licenciado em Direito.",
+]
+
+# Long capitalized runs as they come out of PDF text: all-caps headers, titles without names,
+# titles followed by endless capitalized words, and capitalized runs glued without spaces
+ADVERSARIAL_UNITS = {
+    "all-caps header": "SECRETARIA REGIONAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA\n",
+    "titles without names": "Licenciada A, Doutora ANA, ",
+    "title + endless caps": None,   # Built in adversarial_text
+    "glued caps": "SECRETARIAREGIONAL",
+}
+
+
+# === Legacy matcher (the regex fallback_regex_name_extraction used to compile on every call) ===
+
+def legacy_findall(text: str) -> list[str]:
+    pattern = r"\b(" + "|".join(NAME_TITLES) + r")\s+([A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+(?:\s+[A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+)+)"
+    return [" ".join(match) for match in re.findall(pattern, text)]
+
+
+# === Benchmark ===
+
+def adversarial_text(case: str, size: int) -> str:
+    if case == "title + endless caps":
+        return "Doutora " + "SECRETARIA " * size + "."
+    return ADVERSARIAL_UNITS[case] * size
+
+
+def best_time(func, text: str) -> tuple[float, list[str]]:
+    best, result = float("inf"), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(sizes=SIZES) -> None:
+    matcher = TitledNameMatcher(NAME_TITLES)
+
+    for chunk in NORMAL_CHUNKS:
+        if matcher.findall(chunk) != legacy_findall(chunk):
+            raise AssertionError(f"TitledNameMatcher differs from the legacy regex on: {chunk!r}")
+    print(f"✅ Identical results on {len(NORMAL_CHUNKS)} normal chunks\n")
+
+    print(f"{'case':<22} {'chars':>9} {'legacy (ms)':>12} {'matcher (ms)':>13} {'matcher µs/kchar':>17}")
+    for case in ADVERSARIAL_UNITS:
+        for size in sizes:
+            text = adversarial_text(case, size)
+            legacy_seconds, expected = best_time(legacy_findall, text)
+            matcher_seconds, actual = best_time(matcher.findall, text)
+
+            if actual != expected:
+                raise AssertionError(f"TitledNameMatcher differs from the legacy regex on '{case}' x {size}")
+
+            per_kchar = matcher_seconds * 1e6 / (len(text) / 1000)
+            print(f"{case:<22} {len(text):>9} {legacy_seconds * 1000:>12.2f} {matcher_seconds * 1000:>13.2f} {per_kchar:>17.1f}")
+
+    print("\nA flat µs/kchar column across sizes means the matcher's time grows linearly with the input.")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,131 @@
+import random
+import time
+
+from clean_people_chunk import NAME_TITLES, TRIM_KEYWORDS, UNWANTED_WORDS
+from person_names import PersonNameNormalizer
+
+# === Config ===
+SIZES = [100, 1_000, 5_000]     # Candidates per document
+REPEATS = 3                     # Best of N timings
+SEED = 0
+
+FIRST_NAMES = ["Ana", "Maria", "João", "José", "Rui", "Carla", "Paulo", "Sofia", "Nuno", "Marta", "Pedro", "Rita"]
+SURNAMES = ["Silva", "Sousa", "Freitas", "Gonçalves", "Fernandes", "Rodrigues", "Pereira", "Abreu",
+            "Nóbrega", "Câmara", "Escórcio", "Varela", "Reis", "Gomes", "Andrade", "Teixeira"]
+PARTICLES = ["de", "da", "dos", "e"]
+
+
+# === Legacy chain (the list-based functions PersonNameNormalizer replaces) ===
+
+def legacy_remove_single_word_entities(entities):
+    return [e for e in entities if len(e.split()) > 1]
+
+def legacy_trim_after_keywords(text, keywords):
+    text_lower = text.lower()
+    cut_index = len(text)
+    for kw in keywords:
+        index = text_lower.find(kw.lower())
+        if index != -1 and index < cut_index:
+            cut_index = index
+    return text[:cut_index].strip()
+
+def legacy_keep_shortest_prefix_entities(entities):
+    sorted_entities = sorted(set(entities), key=lambda x: (len(x.split()), x))
+    result = []
+    for ent in sorted_entities:
+        ent_tokens = ent.split()
+        is_extension = False
+        for kept in result:
+            kept_tokens = kept.split()
+            if ent_tokens[:len(kept_tokens)] == kept_tokens:
+                is_extension = True
+                break
+        if not is_extension:
+            result.append(ent)
+    return result
+
+def legacy_normalize_and_deduplicate(entities):
+    normalized = [" ".join(e.split()) for e in entities]
+    return sorted(set(normalized), key=len)
+
+def legacy_remove_entities_with_unwanted_words(entities, unwanted_words):
+    unwanted_words_lower = [w.lower() for w in unwanted_words]
+    filtered = []
+    for ent in entities:
+        ent_words = ent.lower().split()
+        if not any(word in ent_words for word in unwanted_words_lower):
+            filtered.append(ent)
+    return filtered
+
+def legacy_remove_titles_from_entities(entities, titles):
+    titles_lower = [t.lower() for t in titles]
+    cleaned = []
+    for ent in entities:
+        ent_words = ent.strip().split()
+        if ent_words and ent_words[0].lower().rstrip('.') in titles_lower:
+            cleaned.append(" ".join(ent_words[1:]))
+        else:
+            cleaned.append(ent)
+    return cleaned
+
+def legacy_clean(candidates):
+    entities = legacy_remove_single_word_entities(candidates)
+    entities = [legacy_trim_after_keywords(p, TRIM_KEYWORDS) for p in entities]
+    entities = legacy_keep_shortest_prefix_entities(entities)
+    entities = legacy_normalize_and_deduplicate(entities)
+    entities = legacy_remove_entities_with_unwanted_words(entities, UNWANTED_WORDS)
+    return legacy_remove_titles_from_entities(entities, NAME_TITLES)
+
+
+# === Benchmark ===
+
+def random_candidate(rng: random.Random) -> str:
+    """Builds a PER-like candidate: mostly multi-word names, with titles, extensions and noise."""
+    words = [rng.choice(FIRST_NAMES)]
+    for _ in range(rng.randint(0, 5)):
+        if rng.random() < 0.2:
+            words.append(rng.choice(PARTICLES))
+        words.append(rng.choice(SURNAMES))
+
+    roll = rng.random()
+    if roll < 0.1:
+        words.insert(0, rng.choice(NAME_TITLES))
+    elif roll < 0.2:
+        words.append(rng.choice(UNWANTED_WORDS))
+    elif roll < 0.25:
+        words += ["Secretaria", "Regional"]
+    elif roll < 0.3:
+        words += ["Nota", "curricular"]
+
+    separator = "  " if rng.random() < 0.05 else " "
+    return separator.join(words)
+
+
+def best_time(func, candidates) -> tuple[float, list[str]]:
+    best, result = float("inf"), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(candidates)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(sizes=SIZES) -> None:
+    rng = random.Random(SEED)
+    normalizer = PersonNameNormalizer(TRIM_KEYWORDS, UNWANTED_WORDS, NAME_TITLES)
+
+    print(f"{'candidates':>10} {'legacy (ms)':>12} {'normalizer (ms)':>16} {'speedup':>8}")
+    for size in sizes:
+        candidates = [random_candidate(rng) for _ in range(size)]
+
+        legacy_seconds, expected = best_time(legacy_clean, candidates)
+        new_seconds, actual = best_time(lambda c: normalizer.remove_titles(normalizer.clean(c)), candidates)
+
+        if actual != expected:
+            raise AssertionError(f"PersonNameNormalizer differs from the legacy chain on {size} candidates")
+
+        print(f"{size:>10} {legacy_seconds * 1000:>12.2f} {new_seconds * 1000:>16.2f} {legacy_seconds / new_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
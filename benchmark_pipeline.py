@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from clean_paragraphs import clean_text_into_paragraphs, extract_text_from_pdf
+from clean_people_chunk import extract_people_from_chunks
+from html_report import HtmlReportWriter
+from nlp_pipeline import blank_fallback, get_nlp
+from SpaCy01 import (
+    SECTIONING_RULERS,
+    extract_span_between_labels,
+    group_sections_by_secretaria_with_metadata,
+    save_secretaria_dict_to_json,
+)
+
+# === Config ===
+PDF_DIR = "input_PDF"
+TXT_DIR = "raw_TXT"
+SAMPLE_SIZE = 5                  # Gazettes per stage (0 = all)
+SAMPLE_SEED = 0
+REPEATS = 3                      # Best of N timings; memory is measured in one extra run
+BASELINE_PATH = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.10      # Flag a stage 10% slower (docs/s) or hungrier (peak MB) than the baseline
+
+
+def sample_files(input_dir: str, suffix: str, sample_size: int = SAMPLE_SIZE, seed: int = SAMPLE_SEED) -> list[str]:
+    """Returns a reproducible sample of the paths in input_dir ending with suffix."""
+    if not os.path.isdir(input_dir):
+        return []
+    names = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(suffix))
+    if sample_size and len(names) > sample_size:
+        names = sorted(random.Random(seed).sample(names, sample_size))
+    return [os.path.abspath(os.path.join(input_dir, name)) for name in names]
+
+
+@contextmanager
+def scratch_dir():
+    """Runs the block inside a fresh temporary working directory (manifest, store and outputs included)."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+# === Stages ===
+# Each stage takes the prepared corpus and returns (documents, tokens) processed
+
+def stage_pdf_text(corpus):
+    texts = [extract_text_from_pdf(path) for path in corpus["pdfs"]]
+    return len(texts), sum(len(text.split()) for text in texts)
+
+def stage_paragraphs(corpus):
+    for text in corpus["texts"]:
+        clean_text_into_paragraphs(text)
+    return len(corpus["texts"]), corpus["words"]
+
+def stage_sectioning(corpus):
+    tokens = sum(len(doc) for doc in corpus["nlp"].pipe(corpus["texts"]))
+    return len(corpus["texts"]), tokens
+
+def stage_grouping(corpus):
+    for span in corpus["spans"]:
+        group_sections_by_secretaria_with_metadata(span)
+    return len(corpus["spans"]), sum(len(span) for span in corpus["spans"])
+
+def stage_people(corpus):
+    extract_people_from_chunks(corpus["chunks"])
+    return len(corpus["chunks"]), sum(len(chunk.split()) for chunk in corpus["chunks"])
+
+def stage_body_alignment(corpus):
+    # The whole stage as extract_raw_TXT_deleted.py runs it (DES alignment and its exports), without the doc cache
+    import extract_raw_TXT_deleted as aligner
+
+    with scratch_dir():
+        os.makedirs("raw_TXT_deleted")
+        for name, text, secretaria_dict in zip(corpus["names"], corpus["texts"], corpus["sections"]):
+            with open(os.path.join("raw_TXT_deleted", f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+            save_secretaria_dict_to_json(secretaria_dict, f"{name}.txt", output_dir="json_exports")
+        aligner.extract_valid_des_sections_between_valids("raw_TXT_deleted", "json_exports", "raw_json_exports",
+                                                          use_doc_cache=False)
+    return len(corpus["texts"]), corpus["words"]
+
+def stage_writing(corpus):
+    with scratch_dir():
+        for name, secretaria_dict in zip(corpus["names"], corpus["sections"]):
+            save_secretaria_dict_to_json(secretaria_dict, f"{name}.txt", output_dir="json_exports")
+            with HtmlReportWriter(os.path.join("html", f"{name}.html"), name) as report:
+                for secretaria, entries in secretaria_dict.items():
+                    report.heading(secretaria, 2)
+                    for title, entry in entries.items():
+                        report.section(title, {"Autor": ", ".join(entry["autor"])}, entry["chunk"])
+    return len(corpus["names"]), sum(len(chunk.split()) for chunk in corpus["chunks"])
+
+STAGES = {
+    "pdf_text": stage_pdf_text,
+    "paragraphs": stage_paragraphs,
+    "sectioning": stage_sectioning,
+    "grouping": stage_grouping,
+    "people": stage_people,
+    "body_alignment": stage_body_alignment,
+    "json_html_writing": stage_writing,
+}
+
+
+# === Benchmark ===
+
+def prepare_corpus(sample_size: int = SAMPLE_SIZE) -> dict:
+    """Loads the sample gazettes and precomputes the inputs of the later stages, outside the timings."""
+    pdfs = sample_files(PDF_DIR, ".pdf", sample_size)
+    txts = sample_files(TXT_DIR, ".txt", sample_size)
+    if txts:
+        texts = []
+        for path in txts:
+            with open(path, "r", encoding="utf-8") as f:
+                texts.append(f.read())
+        names = [os.path.splitext(os.path.basename(path))[0] for path in txts]
+    else:
+        texts = [extract_text_from_pdf(path) for path in pdfs]
+        names = [os.path.splitext(os.path.basename(path))[0] for path in pdfs]
+
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+    spans = []
+    for doc in nlp.pipe(texts):
+        span = extract_span_between_labels(doc, "SUM", "SEC_DES_SUM")
+        spans.append(span if span is not None else doc[:])
+    sections = [group_sections_by_secretaria_with_metadata(span) for span in spans]
+
+    return {
+        "pdfs": pdfs,
+        "texts": texts,
+        "names": names,
+        "words": sum(len(text.split()) for text in texts),
+        "nlp": nlp,
+        "spans": spans,
+        "sections": sections,
+        "chunks": [entry["chunk"] for secretaria_dict in sections for entries in secretaria_dict.values()
+                   for entry in entries.values()],
+    }
+
+
+def measure(stage, corpus, repeats: int = REPEATS) -> dict:
+    """Returns the best-of-N throughput of a stage and its peak traced memory (from a separate run)."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        docs, tokens = stage(corpus)
+        best = min(best, time.perf_counter() - start)
+
+    # tracemalloc slows allocation-heavy code down, so it never runs during the timed repeats
+    tracemalloc.start()
+    stage(corpus)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = max(best, 1e-9)
+    return {
+        "docs": docs,
+        "tokens": tokens,
+        "seconds": best,
+        "docs_per_s": docs / best,
+        "tokens_per_s": tokens / best,
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict) -> list[str]:
+    """Returns the stages that are slower or use more memory than the baseline, beyond REGRESSION_THRESHOLD."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not result["docs"]:
+            continue
+        if result["docs_per_s"] < base["docs_per_s"] * (1 - REGRESSION_THRESHOLD):
+            regressions.append(f"{name}: {result['docs_per_s']:.2f} docs/s vs {base['docs_per_s']:.2f} in the baseline")
+        if result["peak_mb"] > base["peak_mb"] * (1 + REGRESSION_THRESHOLD):
+            regressions.append(f"{name}: {result['peak_mb']:.1f} MB peak vs {base['peak_mb']:.1f} MB in the baseline")
+    return regressions
+
+
+def run_benchmark(stages=None, save_baseline: bool = False) -> dict:
+    corpus = prepare_corpus()
+    if not corpus["texts"]:
+        print(f"⚠️ No gazettes in '{TXT_DIR}' or '{PDF_DIR}' to benchmark")
+        return {}
+    print(f"📚 {len(corpus['texts'])} gazette(s), {len(corpus['pdfs'])} PDF(s), {len(corpus['chunks'])} despacho chunk(s)\n")
+
+    results = {}
+    for name in stages or STAGES:
+        if name == "pdf_text" and not corpus["pdfs"]:
+            print(f"⏭️ {name}: no PDFs in '{PDF_DIR}'")
+            continue
+        results[name] = measure(STAGES[name], corpus)
+
+    print(f"\n{'stage':<18} {'docs':>6} {'seconds':>9} {'docs/s':>9} {'tokens/s':>11} {'peak MB':>9}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['docs']:>6} {result['seconds']:>9.3f} {result['docs_per_s']:>9.2f} "
+              f"{result['tokens_per_s']:>11.0f} {result['peak_mb']:>9.1f}")
+
+    if save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Baseline saved to: {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f))
+        for regression in regressions:
+            print(f"❌ Regression — {regression}")
+        if not regressions:
+            print(f"\n✅ No regression against: {BASELINE_PATH}")
+
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a sample of gazettes.")
+    parser.add_argument("stages", nargs="*", metavar="stage",
+                        help=f"stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--save-baseline", action="store_true", help=f"save the results to {BASELINE_PATH}")
+    args = parser.parse_args(argv)
+
+    # Checked here rather than with choices=: an empty nargs="*" list fails choices on Python < 3.12
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    # Run offline: without pt_core_news_lg, stages use spacy.blank("pt") + the rulers
+    with blank_fallback():
+        return run_benchmark(stages=args.stages or None, save_baseline=args.save_baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+# === Config ===
+MANIFEST_PATH = "build_manifest.json"
+
+
+def hash_file(path: str) -> str:
+    """Returns the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_config(config) -> str:
+    """Returns the SHA-256 of a JSON-serializable stage configuration (patterns, word lists, labels...)."""
+    payload = json.dumps(config, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records, for every stage and file, the content hashes of its inputs, its outputs and
+    the stage configuration, so that reruns only redo the files whose inputs or config changed.
+
+    Layout of the manifest file:
+        {
+          "files":  {path: {"size": ..., "mtime_ns": ..., "sha256": ...}},   # hash memo
+          "stages": {stage: {key: {"inputs": {path: sha256}, "config": sha256,
+                                   "outputs": {path: sha256}}}}
+        }
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        self.data = {"files": {}, "stages": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def file_hash(self, path: str) -> str:
+        """Returns the SHA-256 of a file, re-reading it only if its size or mtime changed."""
+        stat = os.stat(path)
+        memo = self.data["files"].get(path)
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["sha256"]
+
+        sha256 = hash_file(path)
+        self.data["files"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        return sha256
+
+    def input_hashes(self, paths) -> dict:
+        return {path: self.file_hash(path) for path in paths}
+
+    def stale_files(self, stage: str, input_dir: str, suffix: str, config_hash: str) -> dict:
+        """
+        Returns {filename: input hashes} for the files of input_dir ending in suffix that the
+        stage has to (re)process, in sorted order.
+        """
+        stale = {}
+        for filename in sorted(os.listdir(input_dir)):
+            if not filename.lower().endswith(suffix):
+                continue
+            path = os.path.join(input_dir, filename)
+            inputs = self.input_hashes([path])
+            if not self.is_up_to_date(stage, path, inputs, config_hash):
+                stale[filename] = inputs
+        return stale
+
+    def is_up_to_date(self, stage: str, key: str, inputs: dict, config_hash: str) -> bool:
+        """
+        True if the stage already processed key with the same input hashes and config,
+        and every output it recorded still exists.
+        """
+        entry = self.data["stages"].get(stage, {}).get(key)
+        if entry is None:
+            return False
+        if entry["inputs"] != inputs or entry["config"] != config_hash:
+            return False
+        return all(os.path.exists(path) for path in entry["outputs"])
+
+    def record(self, stage: str, key: str, inputs: dict, config_hash: str, outputs=()) -> None:
+        """Stores the hashes of a finished unit of work."""
+        self.data["stages"].setdefault(stage, {})[key] = {
+            "inputs": inputs,
+            "config": config_hash,
+            "outputs": self.input_hashes(outputs),
+        }
+
+    def forget(self, stage: str, key: str) -> bool:
+        """Drops the record of a unit of work whose outputs were deleted. Returns True if there was one."""
+        return self.data["stages"].get(stage, {}).pop(key, None) is not None
+
+    def outputs_by_input_hash(self, stage: str, config_hash: str) -> dict:
+        """
+        Maps the input hash of every single-input unit of the stage (built with config_hash)
+        to its first output that still holds the content it was recorded with, so exact
+        duplicates (e.g. the same PDF under two names) can reuse that output instead of
+        being processed again.
+        """
+        index = {}
+        for entry in self.data["stages"].get(stage, {}).values():
+            if entry["config"] != config_hash or len(entry["inputs"]) != 1:
+                continue
+            outputs = [
+                path for path, sha256 in entry["outputs"].items()
+                if os.path.exists(path) and self.file_hash(path) == sha256
+            ]
+            if outputs:
+                index.setdefault(next(iter(entry["inputs"].values())), outputs[0])
+        return index
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,40 @@
+import time
+
+from nlp_pipeline import ARTIFACT_PROFILES, NLP_MODEL, build_nlp, load_pipeline, save_pipeline
+from SpaCy01 import SECTIONING_RULERS
+
+# === Config ===
+# (model, rulers, profile) of the pipelines loaded by the scheduled scripts. Only nlp_pipeline.ARTIFACT_PROFILES
+# are serialized ("people" and "full" keep the vectors and load as fast from the model); other scripts
+# (extract_raw_TXT_deleted.py) save their own sectioning artifact on first use.
+PIPELINES = [
+    (NLP_MODEL, SECTIONING_RULERS, "sectioning"),   # SpaCy01.py, compare_pdf_backends.py
+]
+
+
+def build_pipelines(pipelines=PIPELINES) -> None:
+    """
+    Builds every configured pipeline, serializes it to nlp_pipeline.PIPELINE_DIR and
+    compares loading the artifact with building the pipeline from the model.
+    """
+    for model_name, rulers, profile in pipelines:
+        if profile not in ARTIFACT_PROFILES:
+            print(f"⏭️ Skipping {model_name} [{profile}]: not one of the artifact profiles {sorted(ARTIFACT_PROFILES)}")
+            continue
+        print(f"🔧 Building {model_name} [{profile}] with rulers: {[name for name, _ in rulers] or 'none'}")
+        start = time.perf_counter()
+        nlp = build_nlp(model_name, rulers, profile)
+        build_seconds = time.perf_counter() - start
+
+        path = save_pipeline(nlp, model_name, rulers, profile)
+        print(f"✅ Saved to: {path}")
+
+        start = time.perf_counter()
+        load_pipeline(model_name, rulers, profile)
+        artifact_seconds = time.perf_counter() - start
+
+        print(f"⏱️ Load: {artifact_seconds:.2f}s from the artifact vs {build_seconds:.2f}s for spacy.load + rulers")
+
+
+if __name__ == "__main__":
+    build_pipelines()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+from datetime import date
+
+from nlp_pipeline import get_nlp, pipe_txt_files
+from SpaCy01 import (
+    SECTIONING_RULERS,
+    clean_text_reparse,
+    clean_text_single_pass,
+    input_directory,
+    label_to_truncate_after,
+    label_to_remove,
+    label_to_truncate_before,
+)
+from synthetic_gazettes import generate_gazette, write_txt
+
+# Synthetic gazettes (default seed) where the two cleanups once disagreed: removing the
+# HEADER_DATE inside "SECRETARIA ... Despacho n.º 1/2025 / Sumário:" creates a new SEC_DES_SUM
+REGRESSION_GAZETTES = [(10, date(2025, 1, 15)), (28, date(2025, 2, 10))]
+
+
+def first_difference(a: str, b: str) -> int:
+    """Returns the index of the first character where two strings differ."""
+    for i, (char_a, char_b) in enumerate(zip(a, b)):
+        if char_a != char_b:
+            return i
+    return min(len(a), len(b))
+
+
+def check_equivalence(input_dir: str, truncate_label=None, remove_label=None, truncate_label_before=None) -> list[str]:
+    """
+    Runs the single-parse and the re-parsing cleanup on every .txt file of input_dir
+    and reports the files where the two outputs differ.
+
+    Parameters:
+        input_dir (str): Directory containing the raw .txt gazettes.
+        truncate_label (str | None): Label passed as truncate_label to process_txt_files.
+        remove_label (str | None): Label passed as remove_label to process_txt_files.
+        truncate_label_before (str | None): Label passed as truncate_label_before to process_txt_files.
+
+    Returns:
+        list[str]: Filenames whose outputs differ.
+    """
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+    mismatches = []
+    checked = 0
+
+    for doc, filename in pipe_txt_files(nlp, input_dir):
+        checked += 1
+        expected = clean_text_reparse(nlp, doc, truncate_label, remove_label, truncate_label_before)
+        actual = clean_text_single_pass(nlp, doc, truncate_label, remove_label, truncate_label_before)
+
+        if actual == expected:
+            print(f"✅ {filename}")
+            continue
+
+        mismatches.append(filename)
+        index = first_difference(actual, expected)
+        print(f"❌ {filename}: differs at char {index} "
+              f"(single-pass {len(actual)} chars, re-parse {len(expected)} chars)")
+        print(f"   single-pass: {actual[index:index + 60]!r}")
+        print(f"   re-parse:    {expected[index:index + 60]!r}")
+
+    print(f"\n{checked - len(mismatches)}/{checked} files identical")
+    return mismatches
+
+
+def check_regressions(truncate_label=None, remove_label=None, truncate_label_before=None) -> list[str]:
+    """
+    Regenerates the REGRESSION_GAZETTES in a temporary directory and runs check_equivalence on them.
+
+    Returns:
+        list[str]: Filenames whose outputs differ.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for number, day in REGRESSION_GAZETTES:
+            write_txt(generate_gazette(number, day), os.path.join(tmp_dir, f"IISerie-{number}-{day.isoformat()}.txt"))
+        return check_equivalence(tmp_dir, truncate_label, remove_label, truncate_label_before)
+
+
+if __name__ == "__main__":
+    labels = (label_to_truncate_after, label_to_remove, label_to_truncate_before)
+    mismatches = check_regressions(*labels)
+    if os.path.isdir(input_directory):
+        mismatches += check_equivalence(input_directory, *labels)
+    sys.exit(1 if mismatches else 0)
@@ -1,12 +1,16 @@
 import os
 import re
-import pdfplumber
+import time
+
+from html_report import HtmlReportWriter, write_index
+from PDF_to_TXT import PDF_WORKERS, extract_pdf_to_txt, iter_pdf_pages, print_extraction_summary, run_isolated
 
 # === Config ===
 INPUT_DIR = "input_PDF"
 RAW_TXT_DIR = "raw_TXT"           # NEW: Stores raw output from PDF
 OUTPUT_DIR = "output_TXT"
 HTML_DIR = "html_output"
+WORKERS = PDF_WORKERS             # Files processed concurrently (1 = serial)
 
 # Ensure directories exist
 os.makedirs(INPUT_DIR, exist_ok=True)
@@ -19,8 +23,7 @@ def load_txt_file(filepath):
         return f.read()
 
 def extract_text_from_pdf(filepath):
-    with pdfplumber.open(filepath) as pdf:
-        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return "\n".join(text for _, text in iter_pdf_pages(filepath))
 
 def clean_text_into_paragraphs(text):
     text = text.strip()
@@ -31,30 +34,25 @@ def clean_text_into_paragraphs(text):
     return text.strip()
 
 def save_html(paragraphs, output_path):
-    html = "<html><head><meta charset='utf-8'><title>Cleaned Text</title></head><body>\n"
-    for p in paragraphs.split("\n\n"):
-        html += f"<p>{p.strip()}</p>\n"
-    html += "</body></html>"
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    with HtmlReportWriter(output_path, "Cleaned Text") as report:
+        for p in paragraphs.split("\n\n"):
+            report.paragraph(p.strip())
 
 def process_file(filepath, filename):
     print(f"🧹 Processing: {filename}")
+    pages = 0
     if filename.endswith(".pdf"):
-        raw_text = extract_text_from_pdf(filepath)
-
-        # Save raw text before cleaning
+        # Stream the raw text to disk page by page (resumable), then clean it from there
         raw_output_path = os.path.join(RAW_TXT_DIR, f"{os.path.splitext(filename)[0]}.raw.txt")
-        with open(raw_output_path, "w", encoding="utf-8") as f:
-            f.write(raw_text)
+        pages = extract_pdf_to_txt(filepath, raw_output_path)
         print(f"📄 Saved raw text to: {raw_output_path}")
+        raw_text = load_txt_file(raw_output_path)
 
     elif filename.endswith(".txt"):
         raw_text = load_txt_file(filepath)
     else:
         print(f"⏭️ Skipping unsupported file: {filename}")
-        return
+        return 0
 
     cleaned = clean_text_into_paragraphs(raw_text)
 
@@ -69,17 +67,25 @@ def process_file(filepath, filename):
 
     print(f"✅ Saved cleaned text to: {cleaned_txt_path}")
     print(f"🌐 Saved HTML to: {html_output_path}")
+    return pages
 
 def main():
     print(f"\n📂 Reading files from: {INPUT_DIR}\n")
-    files = os.listdir(INPUT_DIR)
+    files = sorted(os.listdir(INPUT_DIR))
     if not files:
         print("⚠️ No files found in input/. Add PDFs or TXTs to process.")
         return
 
-    for filename in files:
-        filepath = os.path.join(INPUT_DIR, filename)
-        process_file(filepath, filename)
+    # Files are processed in a process pool; a failing file is reported instead of aborting the batch
+    jobs = [(os.path.join(INPUT_DIR, filename), filename) for filename in files]
+    start = time.perf_counter()
+    results = run_isolated(process_file, jobs, max_workers=WORKERS)
+    elapsed = time.perf_counter() - start
+
+    failures = [(filename, error) for (_, filename), (_, error) in zip(jobs, results) if error]
+    pages = sum(result for result, error in results if not error)
+    print_extraction_summary(len(jobs), pages, elapsed, failures)
+    write_index(HTML_DIR, "Cleaned texts")
 
     print("\n🎉 All done!")
 
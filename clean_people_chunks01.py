@@ -1,8 +1,7 @@
-import spacy
-import re
+from nlp_pipeline import get_nlp
+from person_names import PersonNameNormalizer, TitledNameMatcher
 
-# Load the spaCy model
-nlp = spacy.load("pt_core_news_lg")
+NLP_MODEL = "pt_core_news_lg"
 
 TRIM_KEYWORDS = ["anexo", "nota curricular", "secretaria"]
 
@@ -72,70 +71,18 @@ NAME_TITLES = [
     "Senhor", "Senhora", "Sr.", "Sra.", "Srª", "D.", "Dom", "Dona"
 ]
 
+NORMALIZER = PersonNameNormalizer(TRIM_KEYWORDS, UNWANTED_WORDS, NAME_TITLES)
+NAME_MATCHER = TitledNameMatcher(NAME_TITLES)
+
 
 def fallback_regex_name_extraction(text: str, known_entities: list[str]) -> list[str]:
-    pattern = r"\b(" + "|".join(NAME_TITLES) + r")\s+([A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+(?:\s+[A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+)+)"
-    matches = re.findall(pattern, text)
-    new_names = [" ".join(match) for match in matches]
+    new_names = NAME_MATCHER.findall(text)
     # Remove duplicatas e nomes já encontrados
     return [name for name in new_names if name not in known_entities]
 
-def remove_single_word_entities(entities):
-    return [e for e in entities if len(e.split()) > 1]
-
-def trim_after_keywords(text, keywords):
-    text_lower = text.lower()
-    cut_index = len(text)
-    for kw in keywords:
-        index = text_lower.find(kw.lower())
-        if index != -1 and index < cut_index:
-            cut_index = index
-    return text[:cut_index].strip()
-
-def normalize_and_deduplicate(entities):
-    normalized = [" ".join(e.split()) for e in entities]
-    return sorted(set(normalized), key=len)
-
-def keep_shortest_prefix_entities(entities):
-    sorted_entities = sorted(set(entities), key=lambda x: (len(x.split()), x))
-    result = []
-    for ent in sorted_entities:
-        ent_tokens = ent.split()
-        is_extension = False
-        for kept in result:
-            kept_tokens = kept.split()
-            if ent_tokens[:len(kept_tokens)] == kept_tokens:
-                is_extension = True
-                break
-        if not is_extension:
-            result.append(ent)
-    return result
-
-def remove_entities_with_unwanted_words(entities, unwanted_words):
-    unwanted_words_lower = [w.lower() for w in unwanted_words]
-    filtered = []
-    for ent in entities:
-        ent_words = ent.lower().split()
-        if not any(word in ent_words for word in unwanted_words_lower):
-            filtered.append(ent)
-    return filtered
-
-def remove_titles_from_entities(entities, titles):
-    titles_lower = [t.lower() for t in titles]
-    cleaned = []
-    for ent in entities:
-        ent_words = ent.strip().split()
-        # Se o primeiro termo for um título, remove
-        if ent_words and ent_words[0].lower().rstrip('.') in titles_lower:
-            cleaned.append(" ".join(ent_words[1:]))
-        else:
-            cleaned.append(ent)
-    return cleaned
-
-
 # ✅ MAIN FUNCTION: extract from chunk
 def extract_people_from_chunk(text: str) -> list[str]:
-    doc = nlp(text)
+    doc = get_nlp(NLP_MODEL, profile="people")(text)
     person_entities = [ent.text.strip() for ent in doc.ents if ent.label_ == "PER"]
     print("PER:" , person_entities)
 
@@ -145,12 +92,8 @@ def extract_people_from_chunk(text: str) -> list[str]:
 
 
 
-    person_entities = remove_single_word_entities(person_entities)
-    person_entities = [trim_after_keywords(p, TRIM_KEYWORDS) for p in person_entities]
-    person_entities = keep_shortest_prefix_entities(person_entities)
-    person_entities = normalize_and_deduplicate(person_entities)
-    person_entities = remove_entities_with_unwanted_words(person_entities, UNWANTED_WORDS)
-    person_entities = remove_titles_from_entities(person_entities, NAME_TITLES)
+    person_entities = NORMALIZER.clean(person_entities)
+    person_entities = NORMALIZER.remove_titles(person_entities)
 
     return person_entities
 
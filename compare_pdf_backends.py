@@ -0,0 +1,141 @@
+import difflib
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from nlp_pipeline import get_nlp
+from pdf_backends import available_backends, get_backend
+from SpaCy01 import SECTIONING_RULERS
+
+# === Config ===
+INPUT_DIR = "input_PDF"
+REPORT_DIR = "backend_comparison"    # Unified diffs against the reference backend
+SAMPLE_SIZE = 5                      # Gazettes compared per run (0 = all)
+SAMPLE_SEED = 0
+REFERENCE_BACKEND = "pdfplumber"
+CHECKED_LABELS = ("DES", "SECRETARIA", "SUM", "HEADER_DATE")
+
+
+def sample_pdfs(input_dir: str, sample_size: int = SAMPLE_SIZE, seed: int = SAMPLE_SEED) -> list[str]:
+    """Returns a reproducible sample of the PDFs in input_dir (all of them if sample_size is 0)."""
+    pdfs = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(".pdf"))
+    if sample_size and len(pdfs) > sample_size:
+        pdfs = sorted(random.Random(seed).sample(pdfs, sample_size))
+    return pdfs
+
+
+def extract_with_backend(pdf_path: str, backend: str) -> tuple[str, int, float]:
+    """Returns (text, pages, seconds) of a full extraction with one backend."""
+    iter_pages = get_backend(backend)
+    start = time.perf_counter()
+    texts = [text for _, text in iter_pages(pdf_path)]
+    return "\n".join(texts), len(texts), time.perf_counter() - start
+
+
+def find_entities(nlp, text: str) -> dict[str, list[str]]:
+    """Returns the texts of the checked sectioning entities found in text, per label."""
+    found = {label: [] for label in CHECKED_LABELS}
+    for ent in nlp(text).ents:
+        if ent.label_ in found:
+            found[ent.label_].append(ent.text.strip())
+    return found
+
+
+def compare_backends(input_dir: str = INPUT_DIR, backends=None, sample_size: int = SAMPLE_SIZE,
+                     reference: str = REFERENCE_BACKEND) -> dict:
+    """
+    Extracts a sample of gazettes with every backend and compares them with the reference backend:
+    speed, text similarity (with a unified diff saved to REPORT_DIR) and whether the sectioning
+    rulers still find the same DES / SECRETARIA / SUM / HEADER_DATE entities downstream.
+
+    Parameters:
+        input_dir (str): Directory containing the PDF gazettes.
+        backends (list[str] | None): Backends to compare; defaults to every installed backend.
+        sample_size (int): Number of gazettes to compare (0 = all).
+        reference (str): Backend the others are diffed against.
+
+    Returns:
+        dict: Per-backend totals {"pages", "seconds", "similarity", "entities", "missing"}.
+    """
+    backends = backends or available_backends()
+    if reference not in backends:
+        backends = [reference] + list(backends)
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+
+    totals = {
+        backend: {"pages": 0, "seconds": 0.0, "similarity": [], "entities": Counter(), "missing": Counter()}
+        for backend in backends
+    }
+
+    for filename in sample_pdfs(input_dir, sample_size):
+        pdf_path = os.path.join(input_dir, filename)
+        print(f"📄 {filename}")
+
+        results = {}
+        for backend in backends:
+            try:
+                results[backend] = extract_with_backend(pdf_path, backend)
+            except Exception as e:
+                print(f"   ❌ {backend}: {type(e).__name__}: {e}")
+
+        if reference not in results:
+            print(f"   ⏭️ Skipping — the reference backend '{reference}' failed")
+            continue
+
+        reference_lines = results[reference][0].splitlines()
+        reference_entities = find_entities(nlp, results[reference][0])
+
+        for backend, (text, pages, seconds) in results.items():
+            total = totals[backend]
+            total["pages"] += pages
+            total["seconds"] += seconds
+
+            entities = find_entities(nlp, text)
+            for label in CHECKED_LABELS:
+                total["entities"][label] += len(entities[label])
+                total["missing"][label] += sum((Counter(reference_entities[label]) - Counter(entities[label])).values())
+
+            if backend == reference:
+                total["similarity"].append(1.0)
+                continue
+
+            lines = text.splitlines()
+            total["similarity"].append(difflib.SequenceMatcher(None, reference_lines, lines, autojunk=False).ratio())
+
+            diff_path = os.path.join(REPORT_DIR, f"{os.path.splitext(filename)[0]}.{backend}.diff")
+            with open(diff_path, "w", encoding="utf-8") as f:
+                f.writelines(difflib.unified_diff(
+                    reference_lines, lines, fromfile=reference, tofile=backend, lineterm="\n", n=1,
+                ))
+
+    print_comparison(totals, reference)
+    return totals
+
+
+def print_comparison(totals: dict, reference: str) -> None:
+    print(f"\n📊 Compared against '{reference}' (diffs in {REPORT_DIR}/)\n")
+    header = f"{'backend':<12} {'pages':>6} {'pages/s':>9} {'similarity':>11}"
+    header += "".join(f" {label:>14}" for label in CHECKED_LABELS)
+    print(header)
+
+    for backend, total in totals.items():
+        pages_per_second = total["pages"] / total["seconds"] if total["seconds"] else 0.0
+        similarity = sum(total["similarity"]) / len(total["similarity"]) if total["similarity"] else 0.0
+        row = f"{backend:<12} {total['pages']:>6} {pages_per_second:>9.2f} {similarity:>11.3f}"
+        for label in CHECKED_LABELS:
+            cell = str(total["entities"][label])
+            if total["missing"][label]:
+                cell += f" (-{total['missing'][label]})"
+            row += f" {cell:>14}"
+        print(row)
+
+    print("\n(-n) = entities the reference found that this backend's text loses downstream")
+
+
+if __name__ == "__main__":
+    # Usage: python compare_pdf_backends.py [backend ...]
+    compare_backends(backends=sys.argv[1:] or None)
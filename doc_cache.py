@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+from collections import deque
+from itertools import chain
+
+from spacy.tokens import DocBin
+
+# === Config ===
+CACHE_DIR = "doc_cache"
+MAX_CACHE_MB = 2048       # Size cap; least recently used shards are evicted beyond it
+
+
+def pipeline_fingerprint(nlp) -> str:
+    """
+    Returns a SHA-256 fingerprint of everything that changes a pipeline's annotations:
+    the model name and version, the active components and the entity-ruler patterns.
+    """
+    info = {
+        "lang": nlp.lang,
+        "model": nlp.meta.get("name"),
+        "version": nlp.meta.get("version"),
+        "spacy_version": nlp.meta.get("spacy_version"),
+        "pipeline": nlp.pipe_names,
+        "patterns": {name: pipe.patterns for name, pipe in nlp.pipeline if hasattr(pipe, "patterns")},
+    }
+    payload = json.dumps(info, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DocCache:
+    """
+    Content-addressed on-disk cache of processed Docs, stored as one DocBin shard per text.
+
+    A shard is keyed by the SHA-256 of the text and the pipeline fingerprint, so editing
+    the text, upgrading the model or changing a ruler pattern never returns stale
+    annotations. Shards are evicted least-recently-used first once the cache grows past
+    max_mb. The cache can be used in place of the pipeline: it is callable and exposes
+    a ``pipe`` method compatible with ``nlp.pipe``.
+    """
+
+    def __init__(self, nlp, cache_dir: str = CACHE_DIR, max_mb: int = MAX_CACHE_MB):
+        self.nlp = nlp
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.fingerprint = pipeline_fingerprint(nlp)
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+        self._defer_eviction = False
+
+    # --- Keys and paths ---
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode("ascii"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.spacy")
+
+    # --- Lookup / store ---
+
+    def _lookup(self, text: str) -> str | None:
+        """Returns the shard path of a cached text, marked as recently used, or None on a miss."""
+        path = self._path(self.key(text))
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        return path
+
+    def _load(self, path: str):
+        return next(iter(DocBin().from_disk(path).get_docs(self.nlp.vocab)))
+
+    def get(self, text: str):
+        """Returns the cached Doc for text, or None on a miss."""
+        path = self._lookup(text)
+        return self._load(path) if path is not None else None
+
+    def put(self, text: str, doc) -> None:
+        """Stores a processed Doc for text, evicting old shards if the cache is over its cap."""
+        path = self._path(self.key(text))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Unique per process, so two processes storing the same text never share a temporary file
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        DocBin(docs=[doc]).to_disk(tmp_path)
+        os.replace(tmp_path, path)
+
+        self._total_bytes = self._cache_size() + os.path.getsize(path)
+        if self._total_bytes > self.max_bytes and not self._defer_eviction:
+            self._evict()
+
+    def __call__(self, text: str):
+        doc = self.get(text)
+        if doc is None:
+            doc = self.nlp(text)
+            self.put(text, doc)
+        return doc
+
+    def pipe(self, texts, as_tuples: bool = False, **pipe_kwargs):
+        """
+        Drop-in replacement for nlp.pipe: cached texts are loaded from disk and only the
+        misses are sent through the pipeline, all in one nlp.pipe call (with the given
+        batch_size / n_process), so worker processes are started once. Docs are yielded
+        in input order.
+
+        Hits waiting for the misses before them are kept as shard paths, not texts or Docs,
+        and eviction is postponed until the end so none of their shards disappears meanwhile.
+        """
+        items = iter(texts)
+        pending = deque()    # (context, shard path of a hit, text of a miss) in input order
+
+        def lookup(item) -> bool:
+            text, context = item if as_tuples else (item, None)
+            path = self._lookup(text)
+            pending.append((context, path, None if path else text))
+            return path is None
+
+        def output(context, doc):
+            return (doc, context) if as_tuples else doc
+
+        def misses():
+            for item in items:
+                if lookup(item):
+                    yield pending[-1][2]
+
+        # Hits are yielded as they are found until the first miss, which starts the pipeline
+        for item in items:
+            if lookup(item):
+                break
+            context, path, _ = pending.popleft()
+            yield output(context, self._load(path))
+        if not pending:
+            return
+
+        self._defer_eviction = True
+        try:
+            for doc in self.nlp.pipe(chain([pending[-1][2]], misses()), **pipe_kwargs):
+                while pending[0][1] is not None:
+                    context, path, _ = pending.popleft()
+                    yield output(context, self._load(path))
+                context, _, text = pending.popleft()
+                self.put(text, doc)
+                yield output(context, doc)
+
+            while pending:
+                context, path, _ = pending.popleft()
+                yield output(context, self._load(path))
+        finally:
+            self._defer_eviction = False
+            if self._cache_size() > self.max_bytes:
+                self._evict()
+
+    # --- Size cap ---
+
+    def _shards(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard_dir in os.listdir(self.cache_dir):
+            shard_path = os.path.join(self.cache_dir, shard_dir)
+            if not os.path.isdir(shard_path):
+                continue
+            for filename in os.listdir(shard_path):
+                if filename.endswith(".spacy"):
+                    yield os.path.join(shard_path, filename)
+
+    def _cache_size(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(os.path.getsize(path) for path in self._shards())
+        return self._total_bytes
+
+    def _evict(self) -> None:
+        """Removes least recently used shards until the cache is back under 90% of its cap."""
+        shards = sorted(self._shards(), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in shards)
+        target = int(self.max_bytes * 0.9)
+
+        for path in shards:
+            if total <= target:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+        self._total_bytes = total
+
+    def stats(self) -> str:
+        return f"doc cache: {self.hits} hits, {self.misses} misses"
@@ -0,0 +1,163 @@
+import os
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from spacy import displacy
+
+from doc_cache import DocCache
+from nlp_pipeline import get_nlp
+from SpaCy01 import SECTIONING_RULERS
+
+# === Config ===
+INPUT_DIR = "raw_TXT"
+HOST = "127.0.0.1"
+PORT = 8765
+FILES_PER_PAGE = 100     # Gazettes per page of the list
+TOKENS_PER_PAGE = 4000   # Tokens rendered per page of a gazette
+PAGE_BREAK_SLACK = 400   # Extra tokens allowed to end a page on a line break
+DOCS_IN_MEMORY = 8       # Recently viewed gazettes kept in memory
+
+# Custom-entity colour map (SpaCy01.py / SpaCy.py)
+ENTITY_COLORS = {
+    "SUM": "#f9e79f",             # Light yellow
+    "SUM:": "#a9dfbf",            # Light green
+    "DES": "#f5b7b1",             # Light pink/red
+    "HEADER_DATE": "#aed6f1",     # Light blue
+    "SECRETARIA": "#f7cacc",      # Light coral
+    "SEC_DES_SUM": "#e6f2ff",
+    "TEXTO": "#6a9fb5",           # Soft blue
+    "HEADER_DATE_CORRESPONDENCIA": "#AED9E0",
+}
+
+STYLE = "body { font-family: sans-serif; margin: 2em; } nav a { margin-right: 1em; }"
+
+# Annotations come from the same pipeline and DocCache as SpaCy01.export_sumario_sections,
+# so a gazette already sectioned there renders without running spaCy again
+nlp = None
+parser = None
+
+
+def page_boundaries(doc, tokens_per_page: int = TOKENS_PER_PAGE) -> list[tuple[int, int]]:
+    """
+    Splits a Doc into token ranges of about tokens_per_page, ending each page on a line
+    break when one is near, and never inside an entity.
+    """
+    boundaries, start = [], 0
+    while start < len(doc):
+        end = min(start + tokens_per_page, len(doc))
+        limit = min(end + PAGE_BREAK_SLACK, len(doc))
+        while end < limit and "\n" not in doc[end - 1].text_with_ws:
+            end += 1
+        while end < len(doc) and doc[end].ent_iob_ == "I":
+            end += 1
+        boundaries.append((start, end))
+        start = end
+    return boundaries or [(0, 0)]
+
+
+@lru_cache(maxsize=DOCS_IN_MEMORY)
+def load_gazette(filename: str, mtime_ns: int):
+    """Returns the annotated Doc of a gazette and its page ranges (cached per file version)."""
+    with open(os.path.join(INPUT_DIR, filename), "r", encoding="utf-8") as f:
+        doc = parser(f.read())
+    return doc, page_boundaries(doc)
+
+
+def list_gazettes() -> list[str]:
+    return sorted(name for name in os.listdir(INPUT_DIR) if name.endswith(".txt"))
+
+
+def _nav(base_url: str, page: int, pages: int) -> str:
+    links = []
+    if page > 1:
+        links.append(f"<a href='{base_url}?page={page - 1}'>&larr; Previous</a>")
+    links.append(f"Page {page} of {pages}")
+    if page < pages:
+        links.append(f"<a href='{base_url}?page={page + 1}'>Next &rarr;</a>")
+    return "<nav>" + " ".join(links) + "</nav>"
+
+
+def _page(title: str, body: str) -> str:
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{escape(title)}</title>"
+            f"<style>{STYLE}</style></head><body>{body}</body></html>")
+
+
+def render_index(page: int) -> str:
+    names = list_gazettes()
+    pages = max(1, -(-len(names) // FILES_PER_PAGE))
+    page = min(max(page, 1), pages)
+    items = "".join(
+        f"<li><a href='/doc/{quote(name)}'>{escape(os.path.splitext(name)[0])}</a></li>"
+        for name in names[(page - 1) * FILES_PER_PAGE:page * FILES_PER_PAGE]
+    )
+    nav = _nav("/", page, pages)
+    body = (f"<h1>Gazettes in {escape(INPUT_DIR)} ({len(names)})</h1>{nav}"
+            f"<ol start='{(page - 1) * FILES_PER_PAGE + 1}'>{items}</ol>{nav}")
+    return _page("Gazettes", body)
+
+
+def render_gazette(filename: str, page: int) -> str:
+    path = os.path.join(INPUT_DIR, filename)
+    doc, boundaries = load_gazette(filename, os.stat(path).st_mtime_ns)
+    page = min(max(page, 1), len(boundaries))
+    start, end = boundaries[page - 1]
+
+    markup = displacy.render(
+        doc[start:end].as_doc(),
+        style="ent",
+        options={"ents": list(ENTITY_COLORS), "colors": ENTITY_COLORS},
+    )
+    nav = _nav(f"/doc/{quote(filename)}", page, len(boundaries))
+    body = f"<p><a href='/'>&larr; All gazettes</a></p><h1>{escape(filename)}</h1>{nav}{markup}{nav}"
+    return _page(filename, body)
+
+
+class ViewerHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+        except ValueError:
+            page = 1
+
+        if url.path == "/":
+            self._send(200, render_index(page))
+        elif url.path.startswith("/doc/"):
+            filename = os.path.basename(unquote(url.path[len("/doc/"):]))
+            if not filename.endswith(".txt") or not os.path.exists(os.path.join(INPUT_DIR, filename)):
+                self._send(404, _page("Not found", f"<h1>Not found: {escape(filename)}</h1>"))
+            else:
+                self._send(200, render_gazette(filename, page))
+        else:
+            self._send(404, _page("Not found", "<h1>Not found</h1>"))
+
+    def _send(self, status: int, html: str):
+        payload = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(host: str = HOST, port: int = PORT) -> None:
+    """Serves the gazettes of INPUT_DIR with their custom entities, rendered on request."""
+    global nlp, parser
+    nlp = get_nlp("pt_core_news_lg", SECTIONING_RULERS, profile="sectioning")
+    parser = DocCache(nlp)
+
+    server = HTTPServer((host, port), ViewerHandler)
+    print(f"🌐 Entity viewer running at: http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(parser.stats())
+
+
+if __name__ == "__main__":
+    serve()
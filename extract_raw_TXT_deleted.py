@@ -1,16 +1,24 @@
 
 import os
-import spacy
-from spacy.pipeline import EntityRuler
 import json
-from spacy import displacy
 from datetime import datetime
 
-from clean_people_chunk import extract_people_from_chunk
+from build_manifest import BuildManifest, hash_config
+from clean_people_chunk import NAME_TITLES, TRIM_KEYWORDS, UNWANTED_WORDS, extract_people_from_chunks
+from doc_cache import DocCache
+from html_report import HtmlReportWriter, write_index
+from memory_budget import MEMORY, PiecedText, entities
+from nlp_pipeline import get_nlp
+from profiler import PROFILER
+from section_export import SECTIONS_JSONL_DIR, jsonl_shard_path, remove_stale_outputs, section_record, write_jsonl_records
+from section_store import SectionStore
 
 INPUT_DIR_TXT = "raw_TXT_deleted"
 OUTPUT_DIR_JSON = "raw_json_exports"
+HTML_OUTPUT_DIR = "raw_html_exports"
 INPUT_DIR_JSON = "json_exports"
+USE_DOC_CACHE = True    # Reuse cached annotations from doc_cache/ when text and pipeline are unchanged
+EXPORT_MODES = ("json", "jsonl", "sqlite")    # "json": nested file per gazette; "jsonl": one flat record per despacho; "sqlite": section_store.py
 
 PRIMARY_PATTERNS = [
     {
@@ -39,11 +47,20 @@ PRIMARY_PATTERNS = [
 ]
 
 # === Setup NLP ===
-nlp = spacy.load("pt_core_news_lg")
-
-# Add composed/override patterns first
-ruler_composed = nlp.add_pipe("entity_ruler", name="ruler_composed", before="ner")
-ruler_composed.add_patterns(PRIMARY_PATTERNS)
+# Add composed/override patterns first; the pipeline is only built when the stage runs
+DES_RULERS = [("ruler_composed", PRIMARY_PATTERNS)]
+
+# === Build Manifest ===
+# Everything that changes this stage's output; editing any of it reprocesses every file
+SECTIONS_STAGE = "des_sections"
+SECTIONS_CONFIG = {
+    "model": "pt_core_news_lg",
+    "patterns": PRIMARY_PATTERNS,
+    "trim_keywords": TRIM_KEYWORDS,
+    "unwanted_words": UNWANTED_WORDS,
+    "name_titles": NAME_TITLES,
+    "exports": list(EXPORT_MODES),
+}
 
 def extract_text_between_labels(doc, start_label: str, end_label: str) -> str | None:
     start, end = None, None
@@ -56,111 +73,179 @@ def extract_text_between_labels(doc, start_label: str, end_label: str) -> str |
     return doc[start:end].text.strip() if start is not None and end is not None else None
 
 
-def extract_valid_des_sections_between_valids(input_txt_dir: str, input_json_dir: str, output_json_dir: str) -> None:
+def extract_valid_des_sections_between_valids(input_txt_dir: str, input_json_dir: str, output_json_dir: str,
+                                              use_doc_cache: bool = USE_DOC_CACHE) -> None:
+    """
+    Splits each cleaned gazette into its DES sections, keeping only the titles listed in the
+    matching sumário JSON. Gazettes whose text, sumário JSON and configuration are unchanged
+    since the last run are skipped.
+    """
     os.makedirs(output_json_dir, exist_ok=True)
 
-    for filename in os.listdir(input_txt_dir):
-        if not filename.endswith(".txt"):
-            continue
-
-        txt_path = os.path.join(input_txt_dir, filename)
-        json_input_path = os.path.join(input_json_dir, filename.replace(".txt", ".json"))
-
-        if not os.path.exists(json_input_path):
-            print(f"Skipping {filename} — no matching JSON in {input_json_dir}")
-            continue
-
-        # Load valid DES titles
-        with open(json_input_path, "r", encoding="utf-8") as jf:
-            json_data = json.load(jf)
-
-        valid_des_titles = {
-            des_title
-            for secretaria in json_data.values()
-            for des_title in secretaria.keys()
-        }
-
-        # Process text
-        with open(txt_path, "r", encoding="utf-8") as tf:
-            text = tf.read()
-        doc = nlp(text)
+    nlp = get_nlp("pt_core_news_lg", DES_RULERS, profile="sectioning")
+    parser = DocCache(nlp) if use_doc_cache else nlp
+
+    manifest = BuildManifest()
+    config_hash = hash_config(SECTIONS_CONFIG)
+    store = SectionStore() if "sqlite" in EXPORT_MODES else None
+
+    try:
+        for filename in os.listdir(input_txt_dir):
+            if not filename.endswith(".txt"):
+                continue
+
+            txt_path = os.path.join(input_txt_dir, filename)
+            json_input_path = os.path.join(input_json_dir, filename.replace(".txt", ".json"))
+            json_output_path = os.path.join(output_json_dir, filename.replace(".txt", ".json"))
+            jsonl_path = jsonl_shard_path(filename.replace(".txt", ""), SECTIONS_JSONL_DIR)
+
+            if not os.path.exists(json_input_path):
+                print(f"Skipping {filename} — no matching JSON in {input_json_dir}")
+                # Its sumário JSON was removed since the last run: so are the sections it listed
+                if manifest.forget(SECTIONS_STAGE, txt_path):
+                    remove_stale_outputs(json_output_path, jsonl_path)
+                    if store is not None:
+                        store.replace_gazette(filename.replace(".txt", ""), "body", [])
+                continue
+
+            inputs = manifest.input_hashes([txt_path, json_input_path])
+            if manifest.is_up_to_date(SECTIONS_STAGE, txt_path, inputs, config_hash):
+                continue
+
+            # Load valid DES titles
+            with open(json_input_path, "r", encoding="utf-8") as jf:
+                json_data = json.load(jf)
+
+            valid_des_titles = {
+                des_title
+                for secretaria in json_data.values()
+                for des_title in secretaria.keys()
+            }
 
-        # Filter valid DES entities (in order)
-        des_ents = [
-            ent for ent in doc.ents
-            if ent.label_ == "DES" and ent.text.strip() in valid_des_titles
-        ]
-        valid_secretaria_titles = {
-            sec_title
-            for sec_title in json_data.keys()
+            # Process text
+            with open(txt_path, "r", encoding="utf-8") as tf:
+                text = tf.read()
+            with MEMORY.track(filename, "parse", len(text)):
+                if PROFILER.enabled:
+                    doc = PROFILER.run(nlp, text, filename)
+                elif MEMORY.over_budget(text):
+                    # Low-memory path for huge supplements: parsed piece by piece below (see memory_budget.py)
+                    print(f"🧩 {filename}: ~{MEMORY.estimate_mb(text):.0f} MB estimated, parsing in pieces")
+                    MEMORY.chunked.append(filename)
+                    doc = PiecedText(nlp, text)
+                else:
+                    doc = parser(text)
+
+                # Filter valid DES entities (in order); sections are cut from the text by character offsets
+                des_ents = [
+                    ent for ent in entities(doc)
+                    if ent.label_ == "DES" and ent.text.strip() in valid_des_titles
+                ]
+            del doc
+            valid_secretaria_titles = {
+                sec_title
+                for sec_title in json_data.keys()
+                }
+            secretaria_by_title = {
+                des_title: sec_title
+                for sec_title, secretaria in json_data.items()
+                for des_title in secretaria.keys()
             }
 
-        #print(valid_secretaria_titles)
+            #print(valid_secretaria_titles)
 
-        sections = {}
-        for i in range(len(des_ents) - 1):
-            ent = des_ents[i]
-            next_ent = des_ents[i + 1]
+            sections = {}
+            for i in range(len(des_ents) - 1):
+                ent = des_ents[i]
+                next_ent = des_ents[i + 1]
 
-            title = ent.text.strip()
-            start = ent.end
-            end = next_ent.start
-            content = doc[start:end].text.strip()
-
-            #print(f"Last line:" + content.splitlines()[-1])
-            if content.splitlines(True)[-1] in valid_secretaria_titles:
-                content_list = content.splitlines(True)[:-1]
-                delimiter = "" #Define a delimiter
-                content = delimiter.join(content_list)
+                title = ent.text.strip()
+                start = ent.end_char
+                end = next_ent.start_char
+                content = text[start:end].strip()
+
+                #print(f"Last line:" + content.splitlines()[-1])
+                if content.splitlines(True)[-1] in valid_secretaria_titles:
+                    content_list = content.splitlines(True)[:-1]
+                    delimiter = "" #Define a delimiter
+                    content = delimiter.join(content_list)
             
 
-            sections[title] = {
-                "text": content,
-                "order": i + 1,
-                "file_date": datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat(),
-                "original_filename": filename.replace(".txt", ""),
-                "people": extract_people_from_chunk(content)
-            }
+                sections[title] = {
+                    "text": content,
+                    "order": i + 1,
+                    "file_date": datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat(),
+                    "original_filename": filename.replace(".txt", ""),
+                }
 
      
-        if des_ents:
-            last_ent = des_ents[-1]
-            title = last_ent.text.strip()
-            content = doc[last_ent.end:].text.strip()
-            sections[title] = {
-                "text": content,
-                "order": len(des_ents),
-                "file_date": datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat(),
-                "original_filename": filename.replace(".txt", ""),
-                "people": extract_people_from_chunk(content)
-           }
-
-        if sections:
-            output_path = os.path.join(output_json_dir, filename.replace(".txt", ".json"))
-            with open(output_path, "w", encoding="utf-8") as out_f:
-                json.dump(sections, out_f, ensure_ascii=False, indent=2)
+            if des_ents:
+                last_ent = des_ents[-1]
+                title = last_ent.text.strip()
+                content = text[last_ent.end_char:].strip()
+                sections[title] = {
+                    "text": content,
+                    "order": len(des_ents),
+                    "file_date": datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat(),
+                    "original_filename": filename.replace(".txt", ""),
+               }
+
+            # One batched NER run for every section of the gazette
+            people = extract_people_from_chunks([section["text"] for section in sections.values()])
+            for section, section_people in zip(sections.values(), people):
+                section["people"] = section_people
+
+            outputs = []
+            if sections and "json" in EXPORT_MODES:
+                with open(json_output_path, "w", encoding="utf-8") as out_f:
+                    json.dump(sections, out_f, ensure_ascii=False, indent=2)
+                outputs.append(json_output_path)
+
+            # The same flat records (secretaria None when the sumário does not list the title) for every export
+            records = [
+                section_record(secretaria_by_title.get(title), title, section["text"], section["people"],
+                               section["order"], section["original_filename"], section["file_date"])
+                for title, section in sections.items()
+            ]
+
+            if sections and "jsonl" in EXPORT_MODES:
+                outputs.append(write_jsonl_records(records, filename.replace(".txt", ""), SECTIONS_JSONL_DIR))
+
+            if not sections:
+                # A gazette that no longer has sections must not keep the files of its previous run
+                remove_stale_outputs(json_output_path, jsonl_path)
+
+            if store is not None:
+                # One transaction per gazette, committed before the manifest marks it as done;
+                # a gazette that no longer has sections loses the rows of its previous run
+                file_date = datetime.fromtimestamp(os.path.getmtime(txt_path)).isoformat()
+                store.replace_gazette(filename.replace(".txt", ""), "body", records, file_date)
             
-            # ✅ Generate HTML here — inside the loop
-        html_output_dir = "raw_html_exports"
-        os.makedirs(html_output_dir, exist_ok=True)
-        html_output_path = os.path.join(html_output_dir, filename.replace(".txt", ".html"))
-
-        html_content = f"<html><head><meta charset='UTF-8'><title>{filename}</title></head><body>"
-        html_content += f"<h1>Sections from: {filename}</h1>"
-
-        for title, data in sections.items():
-            html_content += f"<hr><h2>{title}</h2>"
-            html_content += f"<p><strong>Order:</strong> {data['order']}</p>"
-            html_content += f"<p><strong>File Date:</strong> {data['file_date']}</p>"
-            html_content += f"<p><strong>Original Filename:</strong> {data['original_filename']}</p>"
-            html_content += f"<pre style='background:#f4f4f4;padding:10px;border:1px solid #ccc;'>{data['text']}</pre>"
-
-        html_content += "</body></html>"
-
-        with open(html_output_path, "w", encoding="utf-8") as html_file:
-            html_file.write(html_content)
-
-
-extract_valid_des_sections_between_valids(INPUT_DIR_TXT, INPUT_DIR_JSON, OUTPUT_DIR_JSON)
+                # ✅ Generate HTML here — inside the loop
+            html_output_path = os.path.join(HTML_OUTPUT_DIR, filename.replace(".txt", ".html"))
+            with HtmlReportWriter(html_output_path, filename) as report:
+                report.heading(f"Sections from: {filename}")
+                for title, data in sections.items():
+                    report.section(title, {
+                        "Order": data["order"],
+                        "File Date": data["file_date"],
+                        "Original Filename": data["original_filename"],
+                    }, data["text"])
+
+            outputs.append(html_output_path)
+            manifest.record(SECTIONS_STAGE, txt_path, inputs, config_hash, outputs)
+    finally:
+        manifest.save()
+        if store is not None:
+            store.close()
+
+    if os.path.isdir(HTML_OUTPUT_DIR):
+        write_index(HTML_OUTPUT_DIR, "Gazette sections")
+
+
+if __name__ == "__main__":
+    extract_valid_des_sections_between_valids(INPUT_DIR_TXT, INPUT_DIR_JSON, OUTPUT_DIR_JSON)
+    PROFILER.save_report()
+    MEMORY.save_report()
 
 
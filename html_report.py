@@ -0,0 +1,120 @@
+import os
+from html import escape
+from itertools import islice
+
+# === Config ===
+INDEX_PAGE_SIZE = 200    # Reports listed per index page
+INDEX_NAME = "index"     # index.html, index-2.html, ...
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em; line-height: 1.4; }
+pre { background: #f4f4f4; padding: 10px; border: 1px solid #ccc; white-space: pre-wrap; }
+nav { margin: 1em 0; }
+nav a { margin-right: 1em; }
+"""
+
+
+class HtmlReportWriter:
+    """
+    Streams an HTML report straight to disk: every call escapes its text and writes it to the
+    file handle, so memory stays bounded by the largest single section, not by the report.
+
+    The report is written to "<path>.tmp" and moved into place on close, so a crash never
+    leaves a half-written report behind. Use it as a context manager:
+
+        with HtmlReportWriter(path, title) as report:
+            report.section(title, {"Order": 1}, text)
+    """
+
+    def __init__(self, path: str, title: str):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.f = open(self.tmp_path, "w", encoding="utf-8")
+        self.f.write(f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{escape(title)}</title>"
+                     f"<style>{STYLE}</style></head><body>\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
+            os.remove(self.tmp_path)
+
+    def heading(self, text: str, level: int = 1) -> None:
+        self.f.write(f"<h{level}>{escape(text)}</h{level}>\n")
+
+    def paragraph(self, text: str) -> None:
+        self.f.write(f"<p>{escape(text)}</p>\n")
+
+    def section(self, title: str, fields: dict | None = None, text: str | None = None) -> None:
+        """Writes a titled section: a rule, the title, one line per field and the text as preformatted."""
+        self.f.write(f"<hr><h2>{escape(title)}</h2>\n")
+        for name, value in (fields or {}).items():
+            self.f.write(f"<p><strong>{escape(str(name))}:</strong> {escape(str(value))}</p>\n")
+        if text is not None:
+            self.f.write(f"<pre>{escape(text)}</pre>\n")
+
+    def raw(self, markup: str) -> None:
+        """Writes markup that is already HTML (e.g. displacy.render output) unchanged."""
+        self.f.write(markup)
+
+    def close(self) -> None:
+        self.f.write("</body></html>\n")
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def _index_filename(page: int) -> str:
+    return f"{INDEX_NAME}.html" if page == 1 else f"{INDEX_NAME}-{page}.html"
+
+
+def write_index(report_dir: str, title: str = "Reports", page_size: int = INDEX_PAGE_SIZE) -> int:
+    """
+    Writes a paginated index of the reports in a directory (index.html, index-2.html, ...).
+    Only the report file names are held in memory, and each page is streamed to disk.
+
+    Parameters:
+        report_dir (str): Directory of the .html reports.
+        title (str): Title of the index pages.
+        page_size (int): Reports listed per page.
+
+    Returns:
+        int: Number of index pages written.
+    """
+    names = sorted(
+        name for name in os.listdir(report_dir)
+        if name.endswith(".html") and not (name == f"{INDEX_NAME}.html" or name.startswith(f"{INDEX_NAME}-"))
+    )
+    entries = iter(names)
+
+    page, chunk = 1, list(islice(entries, page_size))
+    while True:
+        next_chunk = list(islice(entries, page_size))
+        with HtmlReportWriter(os.path.join(report_dir, _index_filename(page)), f"{title} — page {page}") as index:
+            index.heading(f"{title} ({len(names)})")
+            index.raw("<nav>")
+            if page > 1:
+                index.raw(f"<a href='{_index_filename(page - 1)}'>&larr; Previous</a>")
+            if next_chunk:
+                index.raw(f"<a href='{_index_filename(page + 1)}'>Next &rarr;</a>")
+            index.raw(f"</nav>\n<ol start='{(page - 1) * page_size + 1}'>\n")
+            for name in chunk:
+                index.raw(f"<li><a href='{escape(name, quote=True)}'>{escape(os.path.splitext(name)[0])}</a></li>\n")
+            index.raw("</ol>\n")
+
+        if not next_chunk:
+            break
+        page, chunk = page + 1, next_chunk
+
+    # Drop index pages left over from a larger archive
+    stale_page = page + 1
+    while os.path.exists(os.path.join(report_dir, _index_filename(stale_page))):
+        os.remove(os.path.join(report_dir, _index_filename(stale_page)))
+        stale_page += 1
+
+    print(f"🗂️ Index ({page} page(s), {len(names)} report(s)) saved to: {os.path.join(report_dir, _index_filename(1))}")
+    return page
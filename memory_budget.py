@@ -0,0 +1,258 @@
+import json
+import os
+import re
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+# === Config ===
+MEMORY_TRACKING = os.environ.get("GAZETTE_MEMORY") == "1"    # Opt in with GAZETTE_MEMORY=1 (or MEMORY.enable())
+DOC_BUDGET_MB = float(os.environ.get("GAZETTE_DOC_BUDGET_MB", 0))    # Estimated Doc memory above which a text is parsed in pieces (0 = off)
+BYTES_PER_CHAR = 400          # Initial estimate of Doc memory per character; raised by what tracking observes
+CHUNK_CHARS = 200_000         # Target size of the pieces of an over-budget text
+LOOKAHEAD_CHARS = 2_000       # Text parsed past a piece's end, so an entity crossing it is kept whole
+LEARN_MIN_CHARS = 10_000      # Shorter parses are dominated by fixed overhead and do not update the estimate
+REPORT_DIR = "profiles"
+
+# Pieces end after a blank line, so the rulers' line-based patterns rarely reach past them
+BLANK_LINE = re.compile(r"\n[ \t]*\n")
+
+_DISABLED = nullcontext()
+
+# Entity of a Doc or a PiecedText, with character offsets in the whole text;
+# prev_end_char is where the text of the token before it ends (0 for the first token)
+Entity = namedtuple("Entity", ["label_", "text", "start_char", "end_char", "prev_end_char"])
+
+
+def current_rss_mb() -> float | None:
+    """Resident set size of this process in MB (Linux /proc), or None where it is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _piece_end(text: str, start: int, chunk_chars: int) -> int:
+    """End of the piece starting at start: right after the last blank line in its second half, if any."""
+    match = None
+    for match in BLANK_LINE.finditer(text, start + chunk_chars // 2, start + chunk_chars):
+        pass
+    return match.end() if match else start + chunk_chars
+
+
+class MemoryTracker:
+    """
+    Optional per-document memory accounting, plus the optional per-document budget of pipe_with_budget.
+
+    Each tracked block records the RSS before and after and the peak of Python allocations
+    (tracemalloc) inside it, per file and stage. When DOC_BUDGET_MB is set, the budget is
+    enforced before parsing: a text whose estimated Doc size exceeds it is handed to the
+    caller as a PiecedText and parsed piece by piece instead of as one Doc. With tracking
+    on, the bytes-per-character estimate is raised to the largest ratio seen in the "parse" stage.
+    """
+
+    def __init__(self, enabled: bool = MEMORY_TRACKING, budget_mb: float = DOC_BUDGET_MB):
+        self.enabled = enabled
+        self.budget_mb = budget_mb
+        self.bytes_per_char = BYTES_PER_CHAR
+        self.records = []      # {"file", "stage", "chars", "rss_before_mb", "rss_after_mb", "peak_mb", "chunked"}
+        self.chunked = []      # Files that took the chunked path
+
+    def enable(self) -> None:
+        self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def estimate_mb(self, text: str) -> float:
+        return len(text) * self.bytes_per_char / (1024 * 1024)
+
+    def over_budget(self, text: str) -> bool:
+        return bool(self.budget_mb) and self.estimate_mb(text) > self.budget_mb
+
+    def track(self, filename: str, stage: str, chars: int = 0):
+        """Records the memory of the enclosed block for a file and stage (a no-op when disabled)."""
+        if not self.enabled:
+            return _DISABLED
+        return self._tracked(filename, stage, chars)
+
+    @contextmanager
+    def _tracked(self, filename: str, stage: str, chars: int):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_traced = tracemalloc.get_traced_memory()[0]
+        rss_before = current_rss_mb()
+        try:
+            yield
+        finally:
+            peak = (tracemalloc.get_traced_memory()[1] - start_traced) / (1024 * 1024)
+            self.records.append({
+                "file": filename,
+                "stage": stage,
+                "chars": chars,
+                "rss_before_mb": rss_before,
+                "rss_after_mb": current_rss_mb(),
+                "peak_mb": peak,
+                "chunked": filename in self.chunked,
+            })
+            if stage == "parse" and chars >= LEARN_MIN_CHARS and filename not in self.chunked:
+                self.bytes_per_char = max(self.bytes_per_char, peak * 1024 * 1024 / chars)
+            if self.budget_mb and peak > self.budget_mb:
+                print(f"⚠️ {filename} used {peak:.0f} MB in '{stage}' (budget {self.budget_mb} MB)")
+
+    # --- Report ---
+
+    def save_report(self, report_dir: str = REPORT_DIR) -> str | None:
+        """Writes memory-<timestamp>.json with every record and prints the largest ones."""
+        if not self.enabled:
+            return None
+
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"memory-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "budget_mb": self.budget_mb,
+                "bytes_per_char": self.bytes_per_char,
+                "chunked": self.chunked,
+                "records": self.records,
+            }, f, ensure_ascii=False, indent=2)
+
+        print(f"\n🧠 {'peak MB':>9} {'RSS after':>10}  stage / file")
+        for record in sorted(self.records, key=lambda r: r["peak_mb"], reverse=True)[:10]:
+            rss = f"{record['rss_after_mb']:.0f}" if record["rss_after_mb"] is not None else "-"
+            print(f"   {record['peak_mb']:>9.1f} {rss:>10}  {record['stage']} / {record['file']}"
+                  + ("  (chunked)" if record["chunked"] else ""))
+        print(f"✅ Memory report saved to: {path} ({len(self.chunked)} file(s) parsed in pieces)")
+        return path
+
+
+# Shared by every module in the process
+MEMORY = MemoryTracker()
+
+
+def iter_pieces(nlp, text: str, chunk_chars: int = CHUNK_CHARS, lookahead: int = LOOKAHEAD_CHARS):
+    """
+    Low-memory parse of a long text: yields (piece_doc, offset) for consecutive pieces of
+    about chunk_chars, offset being the position of the piece in text. Memory is bounded by
+    a couple of pieces as long as the caller does not keep them.
+
+    Each piece is parsed with lookahead characters of the following text and then cut on
+    the first token boundary past its end that is not inside an entity, so an entity crossing
+    the end is kept whole in that piece. The pieces concatenate back to the exact text.
+    """
+    offset = 0
+    while len(text) - offset > chunk_chars:
+        end = _piece_end(text, offset, chunk_chars)
+        doc = nlp(text[offset:end + lookahead])
+        cut = next((token.i for token in doc if token.idx >= end - offset), len(doc))
+        while cut < len(doc) and doc[cut].ent_iob_ == "I":
+            cut += 1
+
+        if 0 < cut < len(doc):
+            next_offset = offset + doc[cut].idx
+            piece = doc[:cut].as_doc()
+        else:
+            # An entity runs past the lookahead: keep the whole parse, the next piece starts after it
+            next_offset = offset + len(doc.text)
+            piece = doc
+        del doc
+        yield piece, offset
+        del piece
+        offset = next_offset
+
+    if offset < len(text) or not text:
+        yield nlp(text[offset:]), offset
+
+
+def doc_entities(doc, offset: int = 0, prev_end_char: int = 0):
+    """Yields the entities of a Doc as Entity tuples, shifted by offset (for a piece of a longer text)."""
+    for ent in doc.ents:
+        if ent.start:
+            before = doc[ent.start - 1]
+            prev_end_char = offset + before.idx + len(before.text)
+        yield Entity(ent.label_, ent.text, offset + ent.start_char, offset + ent.end_char, prev_end_char)
+
+
+class PiecedText:
+    """
+    Stands in for the Doc of an over-budget text (see pipe_with_budget): nothing is parsed
+    until the caller walks its pieces or entities, and no Doc of the whole text is ever built.
+    """
+
+    def __init__(self, nlp, text: str, chunk_chars: int = CHUNK_CHARS):
+        self.nlp = nlp
+        self.text = text
+        self.chunk_chars = chunk_chars
+
+    def pieces(self):
+        """Yields (piece_doc, offset) pairs, see iter_pieces."""
+        return iter_pieces(self.nlp, self.text, self.chunk_chars)
+
+    def entities(self):
+        """Yields the entities of the whole text, parsing one piece at a time."""
+        prev_end_char = 0
+        for piece, offset in self.pieces():
+            yield from doc_entities(piece, offset, prev_end_char)
+            if len(piece):
+                prev_end_char = offset + piece[-1].idx + len(piece[-1].text)
+
+    def window(self, start_label: str, end_label: str):
+        """
+        Parses the text between the first start_label entity and the next end_label entity
+        (like SpaCy01.extract_span_between_labels), stopping at the piece where it ends.
+        Returns the Doc of that window, or None if it is not found.
+        """
+        start = None
+        for ent in self.entities():
+            if ent.label_ == start_label and start is None:
+                start = ent.end_char
+            elif ent.label_ == end_label and start is not None:
+                return self.nlp(self.text[start:ent.start_char])
+        return None
+
+
+def entities(doc):
+    """Entity tuples of a Doc or a PiecedText, with offsets in the whole text."""
+    return doc.entities() if isinstance(doc, PiecedText) else doc_entities(doc)
+
+
+def pipe_with_budget(nlp, pairs, batch_size: int, n_process: int):
+    """
+    Drop-in for nlp.pipe(pairs, as_tuples=True) that never parses an over-budget text whole.
+
+    Texts within budget stream through nlp.pipe as usual; an over-budget text is replaced by
+    an empty placeholder in the stream and yielded as a PiecedText when its turn comes, so
+    documents keep their order and the caller parses it piece by piece. With tracking on,
+    texts are parsed one at a time so each parse is measured on its own.
+    """
+    pipeline = getattr(nlp, "nlp", nlp)  # The pieces skip any DocCache in front of the pipeline
+    oversized = {}
+
+    def stream():
+        for text, filename in pairs:
+            if MEMORY.over_budget(text):
+                oversized[filename] = text
+                yield "", filename
+            else:
+                yield text, filename
+
+    if MEMORY.enabled:
+        docs = stream()
+    else:
+        docs = nlp.pipe(stream(), as_tuples=True, batch_size=batch_size, n_process=n_process)
+
+    for item, filename in docs:
+        text = oversized.pop(filename, None)
+        if text is not None:
+            print(f"🧩 {filename}: ~{MEMORY.estimate_mb(text):.0f} MB estimated, parsing in pieces")
+            MEMORY.chunked.append(filename)
+            doc = PiecedText(pipeline, text)
+        elif MEMORY.enabled:
+            with MEMORY.track(filename, "parse", len(item)):
+                doc = nlp(item)
+        else:
+            doc = item
+        yield doc, filename
@@ -1,38 +1,157 @@
 import os
+import re
 import json
+import time
 
+from build_manifest import BuildManifest, hash_config
+from clean_people_chunk import NAME_TITLES, NLP_MODEL, TRIM_KEYWORDS, UNWANTED_WORDS, extract_people_from_chunks
+from PDF_to_TXT import run_isolated
+from prefilter import MONTHS
+from section_store import DB_PATH, JSON_EXPORT_DIRS, SectionStore
 
+# === Config ===
+CHUNKS_PER_JOB = 256    # Chunks sent to a worker per extract_people_from_chunks call
+METADATA_WORKERS = min(4, os.cpu_count() or 1)    # Each worker loads its own spaCy model
 
-def update_json_files_in_directory(directory_path: str):
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".json"):
-            file_path = os.path.join(directory_path, filename)
+# === Build Manifest ===
+# Files are rewritten in place: the manifest stores their hash after the last refresh,
+# and the hash of each of their entries, so a changed file only re-extracts the entries that changed
+METADATA_STAGE = "metadata"
+METADATA_ENTRY_STAGE = "metadata_entries"
+METADATA_CONFIG = {
+    "version": 1,    # Bump when extract_date_from_text or the people extraction changes behaviour
+    "model": NLP_MODEL,
+    "trim_keywords": TRIM_KEYWORDS,
+    "unwanted_words": UNWANTED_WORDS,
+    "name_titles": NAME_TITLES,
+}
 
-            # Load the JSON data
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+# "3 de março de 2025", "03/03/2025", "03-03-2025" or "2025-03-03"
+DATE_PATTERN = re.compile(
+    r"\b(?P<day>\d{1,2})\.?º?\s+de\s+(?P<month>" + "|".join(MONTHS) + r")\s+de\s+(?P<year>\d{4})\b"
+    r"|\b(?P<d>\d{1,2})[/\-.](?P<m>\d{1,2})[/\-.](?P<y>\d{4})\b"
+    r"|\b(?P<iy>\d{4})-(?P<im>\d{2})-(?P<id>\d{2})\b",
+    re.IGNORECASE,
+)
 
-            updated = False  # Track if file needs to be saved
 
-            # Traverse top-level keys (secretarias)
-            for secretaria, entries in data.items():
-                for despacho_key, entry in entries.items():
-                    text = entry.get("chunk", "")
+def extract_date_from_text(text: str) -> str:
+    """Returns the first date written in the text as YYYY-MM-DD, or "" if there is none."""
+    for match in DATE_PATTERN.finditer(text):
+        if match.group("month"):
+            year, month, day = match.group("year"), MONTHS.index(match.group("month").lower()) + 1, match.group("day")
+        elif match.group("y"):
+            year, month, day = match.group("y"), match.group("m"), match.group("d")
+        else:
+            year, month, day = match.group("iy"), match.group("im"), match.group("id")
 
-                    # Update fields
-                    new_data = extract_date_from_text(text)
-                    new_autor = extract_people_from_chunk(text)
+        if 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+            return f"{year}-{int(month):02d}-{int(day):02d}"
+    return ""
 
-                    if entry.get("data") != new_data:
-                        entry["data"] = new_data
-                        updated = True
 
-                    if entry.get("autor") != new_autor:
-                        entry["autor"] = new_autor
-                        updated = True
+def entry_key(file_path: str, secretaria: str, despacho_key: str) -> str:
+    """Manifest key of one entry of a sumário JSON."""
+    return f"{file_path}::{secretaria}::{despacho_key}"
 
-            # Save changes if any
-            if updated:
-                with open(file_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
 
+def entry_inputs(entry: dict) -> dict:
+    """Manifest inputs of an entry: the hash of all its fields, so a regenerated entry is refreshed again."""
+    return {"entry": hash_config(entry)}
+
+
+def _write_json_atomic(file_path: str, data) -> None:
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+
+def update_json_files_in_directory(directory_path: str, max_workers: int = METADATA_WORKERS):
+    """
+    Refreshes the "data" and "autor" fields of every sumário JSON in a directory.
+
+    Files unchanged since the last refresh are skipped through the build manifest; inside a
+    changed file, only entries that changed since their last refresh (or all of them, when the
+    extractor configuration changed) are re-extracted. The dirty chunks of all files
+    are sent to a process pool in batches of CHUNKS_PER_JOB, and each changed file is then
+    rewritten atomically (and mirrored into the section store when it exists).
+
+    Parameters:
+        directory_path (str): Directory of {secretaria: {despacho: entry}} JSON files.
+        max_workers (int): Worker processes for the people extraction; 1 runs in this process.
+    """
+    manifest = BuildManifest()
+    config_hash = hash_config(METADATA_CONFIG)
+    stale = manifest.stale_files(METADATA_STAGE, directory_path, ".json", config_hash)
+
+    kind = JSON_EXPORT_DIRS.get(os.path.basename(os.path.normpath(directory_path)))
+    store = SectionStore() if kind is not None and os.path.exists(DB_PATH) else None
+
+    # Load the changed files and collect the entries whose chunk changed since the last refresh
+    files, dirty = {}, []
+    total_entries = 0
+    for filename in stale:
+        file_path = os.path.join(directory_path, filename)
+        with open(file_path, "r", encoding="utf-8") as f:
+            files[file_path] = json.load(f)
+
+        # Traverse top-level keys (secretarias)
+        for secretaria, entries in files[file_path].items():
+            for despacho_key, entry in entries.items():
+                total_entries += 1
+                key = entry_key(file_path, secretaria, despacho_key)
+                if not manifest.is_up_to_date(METADATA_ENTRY_STAGE, key, entry_inputs(entry), config_hash):
+                    dirty.append((file_path, key, entry))
+
+    print(f"🔁 {len(dirty)} of {total_entries} entries changed in {len(stale)} file(s) of: {directory_path}")
+
+    start = time.perf_counter()
+    texts = [entry.get("chunk", "") for _, _, entry in dirty]
+    jobs = [(texts[i:i + CHUNKS_PER_JOB],) for i in range(0, len(texts), CHUNKS_PER_JOB)]
+    results = run_isolated(extract_people_from_chunks, jobs, max_workers)
+
+    changed_files, failed_files, failed_keys = set(), set(), set()
+    for job_index, (people, error) in enumerate(results):
+        batch = dirty[job_index * CHUNKS_PER_JOB:(job_index + 1) * CHUNKS_PER_JOB]
+        if error is not None:
+            # Neither the entries nor their files are recorded, so they are retried on the next run
+            failed_files.update(file_path for file_path, _, _ in batch)
+            failed_keys.update(key for _, key, _ in batch)
+            print(f"❌ Failed: {len(batch)} chunk(s) — {error.splitlines()[0]}")
+            continue
+
+        for (file_path, key, entry), new_autor in zip(batch, people):
+            entry["data"] = extract_date_from_text(entry.get("chunk", ""))
+            entry["autor"] = new_autor
+            changed_files.add(file_path)
+
+    try:
+        for file_path, data in files.items():
+            if file_path in changed_files:
+                _write_json_atomic(file_path, data)
+                if store is not None:
+                    filename = os.path.splitext(os.path.basename(file_path))[0]
+                    with store.transaction():
+                        for entries in data.values():
+                            for despacho_key, entry in entries.items():
+                                store.update_section_metadata(filename, kind, despacho_key, entry.get("data"), entry.get("autor"))
+
+                # Record each refreshed entry as written, so the next run only redoes the ones that change
+                for secretaria, entries in data.items():
+                    for despacho_key, entry in entries.items():
+                        key = entry_key(file_path, secretaria, despacho_key)
+                        if key not in failed_keys:
+                            manifest.record(METADATA_ENTRY_STAGE, key, entry_inputs(entry), config_hash)
+
+            # Record the refreshed content so the next run skips it until it changes again
+            if file_path not in failed_files:
+                manifest.record(METADATA_STAGE, file_path, manifest.input_hashes([file_path]), config_hash, [file_path])
+    finally:
+        manifest.save()
+        if store is not None:
+            store.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"📊 {len(dirty)} chunk(s) in {elapsed:.1f}s — {len(dirty) / elapsed:.2f} chunks/s, "
+          f"{len(changed_files)} file(s) rewritten")
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+import spacy
+
+from memory_budget import MEMORY, pipe_with_budget
+from profiler import PROFILER
+
+# === Config ===
+NLP_MODEL = "pt_core_news_lg"
+BATCH_SIZE = 4        # Documents per nlp.pipe batch (whole gazettes are long)
+N_PROCESS = 1         # Worker processes for nlp.pipe; -1 uses every core
+PIPELINE_DIR = "pipelines"    # Serialized, fully configured pipelines (see build_pipelines.py)
+USE_ARTIFACTS = True          # Load ARTIFACT_PROFILES pipelines from PIPELINE_DIR when their hash matches, saving them on a miss
+BLANK_FALLBACK = False        # Use spacy.blank(<lang>) + the rulers when the model isn't installed (benchmarks)
+
+# === Pipeline Profiles ===
+# Keyword arguments for spacy.load, so each stage only pays for the components it reads.
+PROFILES = {
+    # Tokenizer + entity rulers: the section patterns only use lexical attributes
+    "sectioning": {"exclude": ["tok2vec", "morphologizer", "parser", "lemmatizer", "attribute_ruler", "ner", "senter"]},
+    # tok2vec + ner: people extraction only reads PER entities
+    "people": {"exclude": ["morphologizer", "parser", "lemmatizer", "attribute_ruler", "senter"]},
+    # Every component, e.g. for displacy renders
+    "full": {},
+}
+# Profiles whose remaining components never read word vectors, so artifacts can drop them
+VECTORLESS_PROFILES = {"sectioning"}
+# Profiles worth serializing: the others keep the model's vectors, so their artifacts are
+# hundreds of MB and load no faster than spacy.load
+ARTIFACT_PROFILES = VECTORLESS_PROFILES
+
+# === Registry ===
+# One pipeline per (model, profile, rulers) key, shared by every module in the process.
+_PIPELINES = {}
+_LOCK = threading.Lock()
+
+
+def _pipeline_key(model_name: str, rulers, profile: str) -> tuple:
+    """Builds a hashable registry key from the model name, the profile and the ruler pattern sets."""
+    rulers_key = json.dumps([[name, patterns] for name, patterns in rulers], ensure_ascii=False, sort_keys=True)
+    return (model_name, profile, rulers_key)
+
+
+def build_nlp(model_name: str = NLP_MODEL, rulers=(), profile: str = "full"):
+    """
+    Loads a spaCy model with the components of a profile and adds the given entity rulers in order.
+
+    The first ruler is placed before "ner" (or at the end when the profile has no "ner")
+    and every following ruler right after the previous one, so earlier pattern sets take
+    precedence over later ones.
+
+    Parameters:
+        model_name (str): Name of the spaCy model to load.
+        rulers (list[tuple[str, list[dict]]]): (ruler name, patterns) pairs.
+        profile (str): One of PROFILES ("sectioning", "people" or "full").
+
+    Returns:
+        spacy.language.Language: The configured pipeline.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown pipeline profile: {profile!r} (expected one of {sorted(PROFILES)})")
+
+    try:
+        nlp = spacy.load(model_name, **PROFILES[profile])
+    except OSError:
+        if not BLANK_FALLBACK:
+            raise
+        # Tokenizer + rulers only: no statistical NER (PER entities) and no vectors
+        lang = model_name.split("_")[0]
+        print(f"⚠️ Model '{model_name}' not installed, falling back to spacy.blank('{lang}')")
+        nlp = spacy.blank(lang)
+        nlp.meta["blank_fallback"] = True
+
+    previous = None
+    for name, patterns in rulers:
+        if previous is not None:
+            ruler = nlp.add_pipe("entity_ruler", name=name, after=previous)
+        elif "ner" in nlp.pipe_names:
+            ruler = nlp.add_pipe("entity_ruler", name=name, before="ner")
+        else:
+            ruler = nlp.add_pipe("entity_ruler", name=name)
+        ruler.add_patterns(patterns)
+        previous = name
+
+    return nlp
+
+
+# === Serialized Pipelines ===
+
+def pipeline_hash(model_name: str, rulers, profile: str) -> str:
+    """
+    Returns a SHA-256 of everything a serialized pipeline depends on: the model name and
+    installed version, the spaCy version, the profile and the ruler names and patterns.
+    """
+    info = {
+        "key": _pipeline_key(model_name, rulers, profile),
+        "model_version": spacy.util.get_package_version(model_name),
+        "spacy_version": spacy.__version__,
+        "vectorless": profile in VECTORLESS_PROFILES,
+    }
+    payload = json.dumps(info, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def artifact_path(model_name: str, rulers, profile: str) -> str:
+    """Returns the artifact directory of a configuration, e.g. pipelines/pt_core_news_lg-people-base."""
+    ruler_names = "+".join(name for name, _ in rulers) or "base"
+    return os.path.join(PIPELINE_DIR, f"{model_name}-{profile}-{ruler_names}")
+
+
+def save_pipeline(nlp, model_name: str, rulers, profile: str) -> str:
+    """
+    Serializes a pipeline built by build_nlp with nlp.to_disk, stamping its pipeline hash in meta.json.
+    Vectorless profiles drop the word vectors, which make up most of a large model's size and load time.
+
+    Returns:
+        str: The artifact directory.
+    """
+    path = artifact_path(model_name, rulers, profile)
+    if profile in VECTORLESS_PROFILES:
+        nlp.vocab.reset_vectors(width=0)
+    nlp.meta["pipeline_hash"] = pipeline_hash(model_name, rulers, profile)
+
+    # Write next to the target and swap it in, so a reader never sees a half-written artifact
+    os.makedirs(PIPELINE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    nlp.to_disk(tmp_path)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_pipeline(model_name: str, rulers, profile: str):
+    """Loads a configuration's artifact, or returns None if it is missing or its hash does not match."""
+    path = artifact_path(model_name, rulers, profile)
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("pipeline_hash") != pipeline_hash(model_name, rulers, profile):
+        return None
+
+    return spacy.load(path)
+
+
+def get_nlp(model_name: str = NLP_MODEL, rulers=(), profile: str = "full"):
+    """
+    Returns the shared pipeline for a model, profile and ruler configuration, building it on first use.
+
+    Every caller asking for the same model name, profile and ruler patterns gets the
+    same Language instance, so each configuration is loaded only once per process.
+    With USE_ARTIFACTS, a pipeline of ARTIFACT_PROFILES is loaded from PIPELINE_DIR when
+    its pipeline hash matches; otherwise it is built and saved there for the next run.
+    Other profiles are always built from the model.
+
+    Parameters:
+        model_name (str): Name of the spaCy model to load.
+        rulers (list[tuple[str, list[dict]]]): (ruler name, patterns) pairs.
+        profile (str): One of PROFILES ("sectioning", "people" or "full").
+
+    Returns:
+        spacy.language.Language: The shared pipeline.
+    """
+    key = _pipeline_key(model_name, rulers, profile)
+    use_artifact = USE_ARTIFACTS and profile in ARTIFACT_PROFILES
+    with _LOCK:
+        nlp = _PIPELINES.get(key)
+        if nlp is None and use_artifact:
+            nlp = load_pipeline(model_name, rulers, profile)
+        if nlp is None:
+            nlp = build_nlp(model_name, rulers, profile)
+            if use_artifact and not nlp.meta.get("blank_fallback"):
+                try:
+                    save_pipeline(nlp, model_name, rulers, profile)
+                except OSError as e:
+                    print(f"⚠️ Could not save pipeline artifact: {e}")
+        _PIPELINES[key] = nlp
+    return nlp
+
+
+@contextmanager
+def blank_fallback():
+    """
+    Lets get_nlp fall back to spacy.blank when a model isn't installed, inside the block only
+    (benchmarks run offline). The blank pipelines are dropped from the registry on exit, so
+    later callers in the same process get the real models again.
+    """
+    global BLANK_FALLBACK
+    previous = BLANK_FALLBACK
+    BLANK_FALLBACK = True
+    try:
+        yield
+    finally:
+        BLANK_FALLBACK = previous
+        with _LOCK:
+            for key in [key for key, nlp in _PIPELINES.items() if nlp.meta.get("blank_fallback")]:
+                del _PIPELINES[key]
+
+
+# === Batch Processing ===
+
+def iter_txt_files(input_dir: str, filenames=None, prefilter=None):
+    """
+    Yields (text, filename) pairs for the .txt files in a directory.
+
+    Parameters:
+        input_dir (str): Directory containing the .txt files.
+        filenames (iterable[str] | None): Restrict to these files; defaults to every .txt file.
+        prefilter (prefilter.Prefilter | None): Skip the files it rejects (see prefilter.py).
+
+    Yields:
+        tuple[str, str]: The file content and its filename.
+    """
+    if filenames is None:
+        filenames = sorted(os.listdir(input_dir))
+
+    for filename in filenames:
+        if not filename.endswith(".txt"):
+            continue
+        with open(os.path.join(input_dir, filename), "r", encoding="utf-8") as f:
+            text = f.read()
+        if prefilter is not None and not prefilter(text, filename):
+            continue
+        yield text, filename
+
+
+def pipe_txt_files(nlp, input_dir: str, filenames=None, batch_size: int = BATCH_SIZE, n_process: int = N_PROCESS,
+                   prefilter=None):
+    """
+    Streams the .txt files of a directory through nlp.pipe, keeping each filename attached.
+
+    Parameters:
+        nlp: The pipeline to run (anything exposing a spaCy-compatible ``pipe``).
+        input_dir (str): Directory containing the .txt files.
+        filenames (iterable[str] | None): Restrict to these files; defaults to every .txt file.
+        batch_size (int): Number of documents per batch.
+        n_process (int): Number of worker processes (-1 for all cores).
+        prefilter (prefilter.Prefilter | None): Skip the files it rejects without parsing them.
+
+    Yields:
+        tuple[spacy.tokens.Doc, str]: The processed document and its filename; with a memory budget
+        set, a text over it comes as a memory_budget.PiecedText to be parsed piece by piece.
+    """
+    pairs = iter_txt_files(input_dir, filenames, prefilter)
+    if PROFILER.enabled:
+        # One document at a time, component by component, bypassing any doc cache (see profiler.py)
+        yield from PROFILER.pipe(nlp, pairs)
+        return
+    if MEMORY.enabled or MEMORY.budget_mb:
+        # Over-budget texts are handed over unparsed, to be parsed in pieces (see memory_budget.py)
+        yield from pipe_with_budget(nlp, pairs, batch_size, n_process)
+        return
+    yield from nlp.pipe(pairs, as_tuples=True, batch_size=batch_size, n_process=n_process)
@@ -0,0 +1,100 @@
+import importlib.util
+import sys
+
+# === Config ===
+DEFAULT_BACKEND = "pdfplumber"
+
+# pdfminer layout analysis tuned for the gazettes: single-column reading order per text box,
+# no vertical-text detection and no advanced box ordering (boxes_flow=None), which is the slow part
+PDFMINER_LAPARAMS = {
+    "line_margin": 0.5,
+    "char_margin": 2.0,
+    "word_margin": 0.1,
+    "boxes_flow": None,
+    "detect_vertical": False,
+    "all_texts": False,
+}
+
+
+# === Backends ===
+# Each backend yields (page_number, text) one page at a time, starting at start_page,
+# and releases the page's objects before moving on to the next one.
+
+def iter_pages_pdfplumber(pdf_path: str, start_page: int = 0):
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for number in range(start_page, len(pdf.pages)):
+            page = pdf.pages[number]
+            text = page.extract_text() or ""
+            if hasattr(page, "close"):
+                page.close()
+            else:
+                page.flush_cache()
+            yield number, text
+
+
+def iter_pages_pdfminer(pdf_path: str, start_page: int = 0):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+
+    laparams = LAParams(**PDFMINER_LAPARAMS)
+    pages = extract_pages(pdf_path, laparams=laparams, page_numbers=range(start_page, sys.maxsize))
+    for number, layout in enumerate(pages, start=start_page):
+        text = "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+        yield number, text.rstrip("\n")
+
+
+def iter_pages_pypdfium2(pdf_path: str, start_page: int = 0):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for number in range(start_page, len(pdf)):
+            page = pdf[number]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            yield number, text.replace("\r\n", "\n").replace("\r", "\n")
+    finally:
+        pdf.close()
+
+
+BACKENDS = {
+    "pdfplumber": ("pdfplumber", iter_pages_pdfplumber),
+    "pdfminer": ("pdfminer", iter_pages_pdfminer),
+    "pypdfium2": ("pypdfium2", iter_pages_pypdfium2),
+}
+
+
+def available_backends() -> list[str]:
+    """Returns the names of the backends whose library is installed."""
+    return [name for name, (module, _) in BACKENDS.items() if importlib.util.find_spec(module) is not None]
+
+
+def get_backend(name: str = DEFAULT_BACKEND):
+    """
+    Returns the page iterator of a backend.
+
+    Parameters:
+        name (str): One of "pdfplumber", "pdfminer" or "pypdfium2".
+
+    Returns:
+        Callable: iter_pages(pdf_path, start_page=0) yielding (page_number, text).
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+
+    module, iter_pages = BACKENDS[name]
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"PDF backend '{name}' needs the '{module}' package, which is not installed")
+    return iter_pages
+
+
+def backend_config(name: str = DEFAULT_BACKEND) -> dict:
+    """Returns the settings that change a backend's output, for the build manifest."""
+    config = {"extractor": name}
+    if name == "pdfminer":
+        config["laparams"] = PDFMINER_LAPARAMS
+    return config
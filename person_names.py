@@ -0,0 +1,115 @@
+import re
+
+# Characters a name word may start with (as in the fallback regex)
+NAME_INITIALS = "A-ZÁÉÍÓÚÂÊÔÃÕÀÇ"
+
+
+class PersonNameNormalizer:
+    """
+    Cleans the PER candidates of a document in one pass, with every word list compiled once.
+
+    Equivalent to the chain of list-based functions it replaces:
+        remove_single_word_entities -> trim_after_keywords -> keep_shortest_prefix_entities
+        -> normalize_and_deduplicate -> remove_entities_with_unwanted_words
+    and, separately, remove_titles_from_entities. Results are identical, including the order
+    of sorted(set(...), key=len) and the case where a candidate trimmed to "" swallows every other.
+
+    Parameters:
+        trim_keywords (list[str]): Candidates are cut at the first occurrence of any of them.
+        unwanted_words (list[str]): Candidates containing any of these words are dropped.
+        titles (list[str]): Titles stripped from the start of a name by remove_titles.
+    """
+
+    def __init__(self, trim_keywords=(), unwanted_words=(), titles=()):
+        # One alternation finds the leftmost occurrence of any keyword in a single scan
+        self.trim_pattern = re.compile("|".join(re.escape(kw.lower()) for kw in trim_keywords)) if trim_keywords else None
+        self.unwanted_words = frozenset(w.lower() for w in unwanted_words)
+        self.titles = frozenset(t.lower() for t in titles)
+
+    def trim(self, name: str) -> str:
+        """Cuts a name at the first trim keyword (case-insensitive) and strips it."""
+        if self.trim_pattern is None:
+            return name.strip()
+        match = self.trim_pattern.search(name.lower())
+        return (name[:match.start()] if match else name).strip()
+
+    @staticmethod
+    def keep_shortest_prefixes(names) -> list[str]:
+        """
+        Drops names whose tokens extend the tokens of a shorter kept name, using a token trie:
+        each name is checked by walking its own tokens instead of comparing it with every kept name.
+        """
+        trie = {}
+        kept = []
+        end = object()  # Marks a node where a kept name ends
+
+        for name in sorted(set(names), key=lambda x: (len(x.split()), x)):
+            node = trie
+            is_extension = end in node
+            for token in name.split():
+                if is_extension:
+                    break
+                node = node.get(token)
+                if node is None:
+                    break
+                is_extension = end in node
+            if is_extension:
+                continue
+
+            kept.append(name)
+            node = trie
+            for token in name.split():
+                node = node.setdefault(token, {})
+            node[end] = True
+
+        return kept
+
+    def clean(self, candidates) -> list[str]:
+        """
+        Runs the whole cleaning chain over the raw PER candidates of a document.
+
+        Parameters:
+            candidates (list[str]): Entity texts, e.g. [ent.text.strip() for ent in doc.ents if ent.label_ == "PER"].
+
+        Returns:
+            list[str]: The cleaned, deduplicated names, shortest first.
+        """
+        trimmed = [self.trim(name) for name in candidates if len(name.split()) > 1]
+        kept = self.keep_shortest_prefixes(trimmed)
+        normalized = sorted(set([" ".join(name.split()) for name in kept]), key=len)
+        return [name for name in normalized if self.unwanted_words.isdisjoint(name.lower().split())]
+
+    def remove_titles(self, names) -> list[str]:
+        """Removes a leading title ("Licenciada", "Dr." ...) from each name."""
+        cleaned = []
+        for name in names:
+            words = name.strip().split()
+            if words and words[0].lower().rstrip(".") in self.titles:
+                cleaned.append(" ".join(words[1:]))
+            else:
+                cleaned.append(name)
+        return cleaned
+
+
+class TitledNameMatcher:
+    r"""
+    Finds "title + capitalized name" sequences ("Licenciada Ana Cristina Fernandes") with the
+    fallback regex, compiled once instead of on every call:
+        \b(<title>|...)\s+([A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+(?:\s+[A-ZÁÉÍÓÚÂÊÔÃÕÀÇ][\w\-']+)+)
+    Its nested quantifier does not backtrack badly: name characters ([\w\-']) and the gaps
+    between words (\s) are disjoint, so a capitalized run splits into words in only one way.
+    benchmark_name_matcher.py checks its time stays linear on long capitalized runs.
+
+    Parameters:
+        titles (list[str]): Titles that may precede a name (matched literally, case-sensitive).
+    """
+
+    def __init__(self, titles):
+        alternation = "|".join(re.escape(title) for title in titles)
+        self.pattern = re.compile(
+            rf"\b({alternation})\s+([{NAME_INITIALS}][\w\-']+(?:\s+[{NAME_INITIALS}][\w\-']+)+)"
+        )
+
+    def findall(self, text: str) -> list[str]:
+        """Returns every non-overlapping "title name" match, left to right."""
+        return [" ".join(match) for match in self.pattern.findall(text)]
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from build_manifest import hash_file
+
+# === Config ===
+INPUT_DIRS = ["json_exports", "raw_json_exports"]   # SpaCy01.py and extract_raw_TXT_deleted.py outputs
+REGISTRY_PATH = "person_registry.json"
+PARTICLES = {"de", "da", "do", "das", "dos", "e", "d"}
+NAME_FIELDS = ("autor", "pessoas", "people")
+
+# "Escór- cio": a line-break hyphenation once the PDF newline was collapsed into a space
+LINE_BREAK_HYPHEN = re.compile(r"(\w)-\s+(\w)")
+
+
+# === Normalization ===
+
+def fold(text: str) -> str:
+    """Lowercases and strips accents: "Escórcio" -> "escorcio"."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def display_name(name: str) -> str:
+    """Joins line-break hyphenations and collapses whitespace, keeping accents and case."""
+    return " ".join(LINE_BREAK_HYPHEN.sub(r"\1\2", name).split())
+
+
+def name_tokens(name: str) -> list[str]:
+    """Returns the folded tokens of a name without particles, splitting compound surnames."""
+    tokens = re.split(r"[\s\-]+", fold(display_name(name)).replace("'", " "))
+    return [token.rstrip(".") for token in tokens if token and token.rstrip(".") not in PARTICLES]
+
+
+def blocking_key(tokens: list[str]) -> str:
+    """Surname + first initial ("escorcio|a"): only names sharing it are ever compared."""
+    return f"{tokens[-1]}|{tokens[0][0]}"
+
+
+def _token_matches(short: str, long: str) -> bool:
+    # An initial ("A.") matches any token starting with that letter
+    return short == long or (len(short) == 1 and long.startswith(short))
+
+
+def compatible(a: list[str], b: list[str]) -> bool:
+    """
+    True if two token lists can name the same person: same first name (or initial), same surname,
+    and the shorter one's tokens appear in order in the longer one
+    ("Ana Escórcio" ~ "Ana Cristina Fernandes Escórcio", but not ~ "Ana Maria Escórcio Silva").
+    """
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if not (_token_matches(short[0], long[0]) and _token_matches(short[-1], long[-1])):
+        return False
+
+    i = 1
+    for token in short[1:-1]:
+        while i < len(long) - 1 and not _token_matches(token, long[i]):
+            i += 1
+        if i >= len(long) - 1:
+            return False
+        i += 1
+    return True
+
+
+# === Registry ===
+
+class PersonRegistry:
+    """
+    Persistent, incrementally updated mapping of name variants to stable person IDs.
+
+    Names are grouped by blocking key (accent-folded surname + first initial), so a new
+    variant is only compared with the handful of persons in its block, and a variant seen
+    before is resolved with a single dict lookup. A variant joins a person when it is
+    compatible with every variant of that person and with no other person of the block;
+    an ambiguous short form ("Ana Escórcio" next to two different Anas Escórcio) becomes a
+    person of its own instead of being guessed.
+
+    Layout of the registry file:
+        {
+          "persons":  {id: {"name": longest variant, "block": key, "variants": [...], "keys": [...]}},
+          "variants": {folded variant: id},
+          "blocks":   {key: [id, ...]},
+          "sources":  {path: {"sha256": ..., "mentions": [[section, field, name, id], ...]}}
+        }
+    """
+
+    def __init__(self, path: str = REGISTRY_PATH):
+        self.path = path
+        self.data = {"persons": {}, "variants": {}, "blocks": {}, "sources": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def _new_id(self, key: str, name: str) -> str:
+        digest = hashlib.sha1(f"{key}\0{fold(name)}".encode("utf-8")).hexdigest()
+        person_id, n = f"P{digest[:12]}", 1
+        while person_id in self.data["persons"]:
+            person_id, n = f"P{digest[:12]}-{n}", n + 1
+        return person_id
+
+    def resolve(self, name: str) -> str | None:
+        """Returns the person ID of a name, registering a new variant or person when needed."""
+        name = display_name(name)
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+
+        variant = " ".join(tokens)
+        person_id = self.data["variants"].get(variant)
+        if person_id is not None:
+            return person_id
+
+        key = blocking_key(tokens)
+        candidates = [
+            pid for pid in self.data["blocks"].get(key, [])
+            if all(compatible(tokens, k.split()) for k in self.data["persons"][pid]["keys"])
+        ]
+
+        if len(candidates) == 1:
+            person_id = candidates[0]
+            person = self.data["persons"][person_id]
+            person["variants"].append(name)
+            person["keys"].append(variant)
+            if len(name) > len(person["name"]):
+                person["name"] = name
+        else:
+            person_id = self._new_id(key, name)
+            self.data["persons"][person_id] = {"name": name, "block": key, "variants": [name], "keys": [variant]}
+            self.data["blocks"].setdefault(key, []).append(person_id)
+
+        self.data["variants"][variant] = person_id
+        return person_id
+
+    def is_up_to_date(self, path: str, sha256: str) -> bool:
+        source = self.data["sources"].get(path)
+        return source is not None and source["sha256"] == sha256
+
+    def record_source(self, path: str, sha256: str, mentions: list) -> None:
+        self.data["sources"][path] = {"sha256": sha256, "mentions": mentions}
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False)  # No indent: the registry grows with the archive
+        os.replace(tmp_path, self.path)
+
+
+# === Reading the section exports ===
+
+def iter_name_mentions(data: dict):
+    """
+    Yields (section title, field, name) for every extracted person of a section export,
+    in either shape:
+        json_exports:      {secretaria: {despacho: {"autor": [...], "pessoas": [...], ...}}}
+        raw_json_exports:  {despacho: {"text": ..., "people": [...], ...}}
+    """
+    for key, value in data.items():
+        if isinstance(value.get("text"), str):
+            sections = {key: value}
+        else:
+            sections = value
+
+        for title, entry in sections.items():
+            for field in NAME_FIELDS:
+                for name in entry.get(field) or []:
+                    yield title, field, name
+
+
+def resolve_people(input_dirs=INPUT_DIRS, registry_path: str = REGISTRY_PATH) -> PersonRegistry:
+    """
+    Resolves the people of every new or changed section export into stable person IDs and
+    saves the registry. Unchanged files (by content hash) are skipped, so a run after new
+    gazettes arrive only reads the new files.
+
+    Parameters:
+        input_dirs (list[str]): Directories of section JSON files.
+        registry_path (str): Path of the persistent registry.
+
+    Returns:
+        PersonRegistry: The updated registry.
+    """
+    registry = PersonRegistry(registry_path)
+    persons_before = len(registry.data["persons"])
+    files = mentions_total = 0
+
+    try:
+        for input_dir in input_dirs:
+            if not os.path.isdir(input_dir):
+                continue
+
+            for filename in sorted(os.listdir(input_dir)):
+                if not filename.endswith(".json"):
+                    continue
+
+                path = os.path.join(input_dir, filename)
+                sha256 = hash_file(path)
+                if registry.is_up_to_date(path, sha256):
+                    continue
+
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+
+                mentions = []
+                for title, field, name in iter_name_mentions(data):
+                    person_id = registry.resolve(name)
+                    if person_id is not None:
+                        mentions.append([title, field, name, person_id])
+
+                registry.record_source(path, sha256, mentions)
+                files += 1
+                mentions_total += len(mentions)
+    finally:
+        registry.save()
+
+    new_persons = len(registry.data["persons"]) - persons_before
+    print(f"👥 {files} new or changed file(s), {mentions_total} mention(s), "
+          f"{new_persons} new person(s), {len(registry.data['persons'])} in total")
+    return registry
+
+
+if __name__ == "__main__":
+    resolve_people()
@@ -0,0 +1,52 @@
+import re
+
+# === Markers ===
+# Substrings every entity of a label must contain. A text without a label's marker can never
+# produce that entity, so screening on markers skips documents without changing any output.
+SUMARIO = r"Sumário"                    # SUM, SUM:, SEC_DES_SUM
+CORRESPONDENCIA = r"CORRESPONDÊNCIA"    # HEADER_DATE_CORRESPONDENCIA
+NUMERO = r"(?i:número)"                 # HEADER_DATE / HEADER_DATE_CORRESPONDENCIA in SpaCy01
+SECRETARIA = r"SECRETARIA"              # SECRETARIA in SpaCy.py
+MONTHS = (
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+)
+
+
+def keywords(*words: str) -> str:
+    """Returns a case-insensitive marker matching any of the words (as the LOWER attribute does)."""
+    return "(?i:" + "|".join(re.escape(word) for word in words) + ")"
+
+
+class Prefilter:
+    """
+    Compiled pre-screen that decides, from the raw text alone, whether a document can yield
+    any of a stage's entities before it is sent through spaCy.
+
+    A text is accepted when it contains every marker of require_all and at least one marker
+    of require_any (when given). Rejected filenames are kept in ``rejected`` so a stage can
+    still record or copy them, and ``report()`` prints the skip rate.
+    """
+
+    def __init__(self, name: str, require_all=(), require_any=()):
+        self.name = name
+        self.require_all = [re.compile(marker) for marker in require_all]
+        self.require_any = re.compile("|".join(f"(?:{marker})" for marker in require_any)) if require_any else None
+        self.checked = 0
+        self.rejected = []
+
+    def __call__(self, text: str, filename: str | None = None) -> bool:
+        """Returns True if the text may contain the stage's entities; records it as rejected otherwise."""
+        self.checked += 1
+        accepted = all(marker.search(text) for marker in self.require_all)
+        if accepted and self.require_any is not None:
+            accepted = self.require_any.search(text) is not None
+
+        if not accepted:
+            self.rejected.append(filename)
+        return accepted
+
+    def report(self) -> str:
+        skipped = len(self.rejected)
+        rate = skipped / self.checked if self.checked else 0.0
+        return f"🔎 Pre-filter '{self.name}': skipped {skipped}/{self.checked} document(s) before NLP ({rate:.1%})"
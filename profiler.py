@@ -0,0 +1,151 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# === Config ===
+PROFILING = os.environ.get("GAZETTE_PROFILE") == "1"    # Opt in with GAZETTE_PROFILE=1 (or PROFILER.enable())
+REPORT_DIR = "profiles"
+TOP_N = 10    # Slowest documents listed in the report
+
+_DISABLED = nullcontext()
+
+
+class Profiler:
+    """
+    Opt-in timing of pipeline components and named post-processing steps, per document.
+
+    When disabled, step() returns a shared no-op context manager, so instrumented code pays a
+    single attribute check per call. When enabled, pipe() runs each pipeline component by hand
+    on one document at a time (instead of nlp.pipe batches) so every component can be timed,
+    and every step is charged to the document currently being processed.
+
+    Steps may nest (a profiled function calling another one): each step is charged its
+    own time only, without the time of the steps inside it, so the step times add up to
+    the wall time of the run.
+    """
+
+    def __init__(self, enabled: bool = PROFILING):
+        self.enabled = enabled
+        self.current = None    # Document the steps are charged to
+        self.steps = {}        # step -> {"calls", "seconds", "tokens"}
+        self.documents = {}    # document -> {"tokens", "seconds", "steps": {step: seconds}}
+        self._children = []    # Time spent in nested steps, one accumulator per open step
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def _record(self, name: str, seconds: float, tokens: int) -> None:
+        step = self.steps.setdefault(name, {"calls": 0, "seconds": 0.0, "tokens": 0})
+        step["calls"] += 1
+        step["seconds"] += seconds
+        step["tokens"] += tokens
+
+        document = self.documents.setdefault(self.current or "(none)", {"tokens": 0, "seconds": 0.0, "steps": {}})
+        document["seconds"] += seconds
+        document["steps"][name] = document["steps"].get(name, 0.0) + seconds
+
+    def step(self, name: str, tokens: int = 0):
+        """Times the enclosed block as one call of a named step (a no-op when disabled)."""
+        if not self.enabled:
+            return _DISABLED
+        return self._timed(name, tokens)
+
+    @contextmanager
+    def _timed(self, name: str, tokens: int):
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            self._record(name, own, tokens)
+
+    def profiled(self, name: str):
+        """Decorator timing every call of a function as a step (a single flag check when disabled)."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._timed(name, 0):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def run(self, nlp, text: str, document: str):
+        """Runs the tokenizer and every component of a pipeline on one text, timing each of them."""
+        self.current = document
+        with self.step("tokenizer", len(text.split())):
+            doc = nlp.make_doc(text)
+        self.documents.setdefault(document, {"tokens": 0, "seconds": 0.0, "steps": {}})["tokens"] += len(doc)
+
+        for name, component in nlp.pipeline:
+            with self.step(name, len(doc)):
+                doc = component(doc)
+        return doc
+
+    def pipe(self, nlp, pairs):
+        """Drop-in for nlp.pipe(pairs, as_tuples=True) that profiles each document (see run)."""
+        nlp = getattr(nlp, "nlp", nlp)  # Profile the pipeline itself, not a DocCache in front of it
+        for text, document in pairs:
+            yield self.run(nlp, text, document), document
+
+    # --- Report ---
+
+    def slowest(self, n: int = TOP_N) -> list[tuple[str, dict]]:
+        return sorted(self.documents.items(), key=lambda item: item[1]["seconds"], reverse=True)[:n]
+
+    def save_report(self, report_dir: str = REPORT_DIR, top_n: int = TOP_N) -> str | None:
+        """
+        Writes profile-<timestamp>.json (step totals, per-document times, top-N slowest documents)
+        and profile-<timestamp>.csv (one row per document and step), and prints the summary.
+
+        Returns:
+            str | None: Path of the JSON report, or None when profiling is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        os.makedirs(report_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        json_path = os.path.join(report_dir, f"profile-{stamp}.json")
+        csv_path = os.path.join(report_dir, f"profile-{stamp}.csv")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "steps": self.steps,
+                "documents": self.documents,
+                "slowest": [name for name, _ in self.slowest(top_n)],
+            }, f, ensure_ascii=False, indent=2)
+
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["document", "tokens", "step", "seconds"])
+            for document, data in self.documents.items():
+                for name, seconds in data["steps"].items():
+                    writer.writerow([document, data["tokens"], name, f"{seconds:.6f}"])
+
+        total = sum(step["seconds"] for step in self.steps.values()) or 1e-9
+        print(f"\n⏱️ {'step':<28} {'calls':>7} {'seconds':>9} {'share':>7} {'tokens/s':>11}")
+        for name, step in sorted(self.steps.items(), key=lambda item: item[1]["seconds"], reverse=True):
+            tokens_per_second = step["tokens"] / step["seconds"] if step["seconds"] else 0.0
+            print(f"   {name:<28} {step['calls']:>7} {step['seconds']:>9.3f} {step['seconds'] / total:>7.1%} "
+                  f"{tokens_per_second:>11.0f}")
+
+        print(f"\n🐢 Slowest {top_n} document(s):")
+        for document, data in self.slowest(top_n):
+            slowest_step = max(data["steps"], key=data["steps"].get) if data["steps"] else "-"
+            print(f"   {data['seconds']:>8.3f}s {data['tokens']:>8} tokens  {document}  (mostly {slowest_step})")
+
+        print(f"✅ Profile saved to: {json_path} and {csv_path}")
+        return json_path
+
+
+# Shared by every module in the process
+PROFILER = Profiler()
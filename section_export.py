@@ -0,0 +1,203 @@
+import json
+import os
+import re
+import shutil
+
+from build_manifest import BuildManifest, hash_config
+
+# === Config ===
+# One JSONL shard per gazette, one line per despacho
+SUMARIO_JSONL_DIR = "sumario_jsonl"     # SpaCy01.py: despachos listed in each sumário
+SECTIONS_JSONL_DIR = "sections_jsonl"   # extract_raw_TXT_deleted.py: full despacho texts
+PARQUET_DIR = "parquet"                 # Compacted datasets: parquet/<jsonl dir>/year=YYYY/month=MM
+PARQUET_STAGE = "parquet_compaction"
+RECORD_FIELDS = ["secretaria", "title", "chunk", "people", "order", "original_filename", "file_date"]
+
+# "IISerie-095-2025-05-28Supl" -> 2025-05-28
+FILENAME_DATE = re.compile(r"(?<!\d)(\d{4})-(\d{2})-(\d{2})(?!\d)")
+
+
+def section_record(secretaria: str, title: str, chunk: str, people: list, order: int,
+                   original_filename: str, file_date: str) -> dict:
+    """Builds the flat record of one despacho."""
+    return {
+        "secretaria": secretaria,
+        "title": title,
+        "chunk": chunk,
+        "people": people,
+        "order": order,
+        "original_filename": original_filename,
+        "file_date": file_date,
+    }
+
+
+def jsonl_shard_path(original_filename: str, jsonl_dir: str = SECTIONS_JSONL_DIR) -> str:
+    """Returns the path of the JSONL shard of a gazette."""
+    return os.path.join(jsonl_dir, f"{original_filename}.jsonl")
+
+
+def remove_stale_outputs(*paths: str) -> int:
+    """
+    Deletes the files a gazette exported in a previous run but no longer has content for
+    (e.g. its JSONL shard once it yields no sections), so they stop feeding compact_to_parquet.
+    Returns how many of them existed.
+    """
+    removed = 0
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+            print(f"🗑️ Removed stale output: {path}")
+    return removed
+
+
+def write_jsonl_records(records, original_filename: str, jsonl_dir: str = SECTIONS_JSONL_DIR) -> str:
+    """
+    Streams the records of one gazette to "<jsonl_dir>/<original_filename>.jsonl", one line per
+    record, replacing the previous shard of the same gazette atomically.
+
+    Parameters:
+        records (iterable[dict]): Records built with section_record.
+        original_filename (str): Gazette name without extension.
+        jsonl_dir (str): Directory of the JSONL shards.
+
+    Returns:
+        str: Path of the shard.
+    """
+    os.makedirs(jsonl_dir, exist_ok=True)
+    path = jsonl_shard_path(original_filename, jsonl_dir)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+    print(f"✅ JSONL saved to: {path}")
+    return path
+
+
+def iter_jsonl(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def gazette_date(original_filename: str) -> str | None:
+    """
+    Returns the publication date in a gazette name as YYYY-MM-DD, or None if it has none.
+    Unlike file_date (when the .txt was written), it does not change when a gazette is re-extracted.
+    """
+    match = FILENAME_DATE.search(os.path.basename(original_filename))
+    return "-".join(match.groups()) if match else None
+
+
+def _partition(path: str) -> str:
+    """Returns the year=YYYY/month=MM partition of a shard, from the publication date in its gazette name."""
+    published = gazette_date(os.path.splitext(os.path.basename(path))[0])
+    if published is None:
+        return os.path.join("year=unknown", "month=unknown")
+    return os.path.join(f"year={published[:4]}", f"month={published[5:7]}")
+
+
+def _remove_stale_partitions(parquet_dir: str, partitions, manifest: BuildManifest) -> int:
+    """Deletes the partition directories of parquet_dir that no shard belongs to anymore."""
+    if not os.path.isdir(parquet_dir):
+        return 0
+
+    removed = 0
+    for year in sorted(os.listdir(parquet_dir)):
+        year_dir = os.path.join(parquet_dir, year)
+        if not (year.startswith("year=") and os.path.isdir(year_dir)):
+            continue
+        for month in sorted(os.listdir(year_dir)):
+            partition = os.path.join(year, month)
+            if not month.startswith("month=") or partition in partitions:
+                continue
+            partition_dir = os.path.join(parquet_dir, partition)
+            shutil.rmtree(partition_dir)
+            manifest.forget(PARQUET_STAGE, partition_dir)
+            removed += 1
+            print(f"🗑️ Removed empty partition: {partition_dir}")
+        if not os.listdir(year_dir):
+            os.rmdir(year_dir)
+    return removed
+
+
+def compact_to_parquet(jsonl_dir: str = SECTIONS_JSONL_DIR, parquet_dir: str | None = None) -> None:
+    """
+    Compacts the JSONL shards into one Parquet file per year/month partition (hive layout), so
+    analytics can scan columns such as secretaria, people or file_date without parsing chunk text.
+
+    Shards are partitioned by the publication date in the gazette name, so every shard belongs to
+    exactly one partition and re-extracting an old gazette does not move it. Only partitions whose
+    shards changed since the last compaction are rewritten, partitions left without shards are
+    deleted, and memory is bounded by the largest partition. Needs pyarrow.
+
+    Parameters:
+        jsonl_dir (str): Directory of the JSONL shards.
+        parquet_dir (str | None): Root directory of the partitioned dataset; defaults to parquet/<jsonl dir>.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("secretaria", pa.string()),
+        ("title", pa.string()),
+        ("chunk", pa.string()),
+        ("people", pa.list_(pa.string())),
+        ("order", pa.int32()),
+        ("original_filename", pa.string()),
+        ("file_date", pa.string()),
+    ])
+
+    parquet_dir = parquet_dir or os.path.join(PARQUET_DIR, os.path.basename(os.path.normpath(jsonl_dir)))
+    if not os.path.isdir(jsonl_dir):
+        print(f"⚠️ No JSONL shards in '{jsonl_dir}'")
+        return
+
+    partitions = {}
+    for filename in sorted(os.listdir(jsonl_dir)):
+        if filename.endswith(".jsonl"):
+            shard_path = os.path.join(jsonl_dir, filename)
+            partitions.setdefault(_partition(shard_path), []).append(shard_path)
+
+    manifest = BuildManifest()
+    config_hash = hash_config({"schema": str(schema)})
+    rewritten = 0
+
+    try:
+        removed = _remove_stale_partitions(parquet_dir, partitions, manifest)
+        for partition, shard_paths in sorted(partitions.items()):
+            partition_dir = os.path.join(parquet_dir, partition)
+            output_path = os.path.join(partition_dir, "part-0.parquet")
+
+            inputs = manifest.input_hashes(shard_paths)
+            if manifest.is_up_to_date(PARQUET_STAGE, partition_dir, inputs, config_hash):
+                continue
+
+            columns = {field: [] for field in RECORD_FIELDS}
+            for shard_path in shard_paths:
+                for record in iter_jsonl(shard_path):
+                    for field in RECORD_FIELDS:
+                        columns[field].append(record.get(field))
+
+            os.makedirs(partition_dir, exist_ok=True)
+            tmp_path = f"{output_path}.tmp"
+            pq.write_table(pa.table(columns, schema=schema), tmp_path)
+            os.replace(tmp_path, output_path)
+
+            manifest.record(PARQUET_STAGE, partition_dir, inputs, config_hash, [output_path])
+            rewritten += 1
+            print(f"✅ Parquet saved to: {output_path} ({len(columns['title'])} records)")
+    finally:
+        manifest.save()
+
+    print(f"📦 {rewritten} of {len(partitions)} partition(s) rewritten, {removed} removed in: {parquet_dir}")
+
+
+if __name__ == "__main__":
+    for jsonl_dir in (SUMARIO_JSONL_DIR, SECTIONS_JSONL_DIR):
+        compact_to_parquet(jsonl_dir)
@@ -0,0 +1,340 @@
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+
+from section_export import gazette_date
+
+# === Config ===
+DB_PATH = "sections.sqlite"
+
+JSON_EXPORT_DIRS = {"json_exports": "sumario", "raw_json_exports": "body"}   # Imported by import_json_exports
+
+# "Despacho n.º 464/2025" -> ("despacho", "464/2025")
+DESPACHO_TITLE = re.compile(r"^(?P<type>.*?)\s*n\.\s*º\s*(?P<number>\d[\d/.\-]*\d|\d)", re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gazettes (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    file_date TEXT,                     -- When the gazette file was processed
+    gazette_date TEXT                   -- Publication date, from the gazette name
+);
+CREATE TABLE IF NOT EXISTS secretarias (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    gazette_id INTEGER NOT NULL REFERENCES gazettes(id) ON DELETE CASCADE,
+    secretaria_id INTEGER REFERENCES secretarias(id),
+    kind TEXT NOT NULL,                 -- "sumario" (SpaCy01.py) or "body" (extract_raw_TXT_deleted.py)
+    title TEXT NOT NULL,
+    despacho_type TEXT,
+    despacho_number TEXT,
+    ord INTEGER,
+    chunk TEXT,
+    data TEXT,
+    UNIQUE (gazette_id, kind, title)
+);
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS section_people (
+    section_id INTEGER NOT NULL REFERENCES sections(id) ON DELETE CASCADE,
+    person_id INTEGER NOT NULL REFERENCES people(id),
+    role TEXT NOT NULL,                 -- "autor", "pessoas" or "people"
+    PRIMARY KEY (section_id, person_id, role)
+);
+CREATE INDEX IF NOT EXISTS idx_gazettes_date ON gazettes(gazette_date);
+CREATE INDEX IF NOT EXISTS idx_sections_secretaria ON sections(secretaria_id);
+CREATE INDEX IF NOT EXISTS idx_sections_number ON sections(despacho_number);
+CREATE INDEX IF NOT EXISTS idx_section_people_person ON section_people(person_id);
+"""
+
+# External-content FTS5 index over the section text, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    title, chunk, content='sections', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, title, chunk) VALUES (new.id, new.title, new.chunk);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, title, chunk) VALUES ('delete', old.id, old.title, old.chunk);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_au AFTER UPDATE OF title, chunk ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, title, chunk) VALUES ('delete', old.id, old.title, old.chunk);
+    INSERT INTO sections_fts(rowid, title, chunk) VALUES (new.id, new.title, new.chunk);
+END;
+"""
+
+
+def parse_despacho_title(title: str) -> tuple[str | None, str | None]:
+    """Splits a DES title into its type and number: "Despacho n.º 464/2025" -> ("despacho", "464/2025")."""
+    match = DESPACHO_TITLE.match(title.strip())
+    if match is None:
+        return None, None
+    return match.group("type").lower() or None, match.group("number")
+
+
+class SectionStore:
+    """
+    SQLite store of gazettes, secretarias, sections and the people named in them, with an FTS5
+    index over section text (when the SQLite build has FTS5).
+
+    Each gazette is written with replace_gazette in a single transaction, so a gazette's
+    sections are always either the old or the new ones; wrap several calls in transaction()
+    to commit them together.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)  # Transactions are explicit
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self._depth = 0
+
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False  # SQLite built without FTS5: text search falls back to LIKE
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Groups writes into one transaction; nested calls join the outer one."""
+        if self._depth == 0:
+            self.conn.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self.conn.execute("COMMIT")
+
+    # --- Writes ---
+
+    def _id(self, table: str, name: str) -> int:
+        self.conn.execute(f"INSERT OR IGNORE INTO {table}(name) VALUES (?)", (name,))
+        return self.conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+
+    def replace_gazette(self, filename: str, kind: str, sections: list, file_date: str | None = None) -> None:
+        """
+        Replaces the sections of one kind of a gazette.
+
+        Parameters:
+            filename (str): Gazette name without extension.
+            kind (str): "sumario" or "body".
+            sections (list[dict]): Records with secretaria, title, chunk, order and people
+                (see section_export.section_record); optional "data", "pessoas" and "people_role".
+            file_date (str | None): ISO date of the gazette file; the publication date is read from filename.
+        """
+        with self.transaction():
+            self.conn.execute(
+                "INSERT INTO gazettes(filename, file_date, gazette_date) VALUES (?, ?, ?) "
+                "ON CONFLICT(filename) DO UPDATE SET file_date = COALESCE(excluded.file_date, file_date), "
+                "gazette_date = excluded.gazette_date",
+                (filename, file_date, gazette_date(filename)),
+            )
+            gazette_id = self.conn.execute("SELECT id FROM gazettes WHERE filename = ?", (filename,)).fetchone()[0]
+            self.conn.execute("DELETE FROM sections WHERE gazette_id = ? AND kind = ?", (gazette_id, kind))
+
+            # Titles are unique per gazette and kind; as in the JSON exports, the last one wins
+            sections = {section["title"]: section for section in sections}.values()
+
+            links = []
+            for section in sections:
+                secretaria_id = self._id("secretarias", section["secretaria"]) if section.get("secretaria") else None
+                despacho_type, despacho_number = parse_despacho_title(section["title"])
+                cursor = self.conn.execute(
+                    "INSERT INTO sections(gazette_id, secretaria_id, kind, title, despacho_type, despacho_number, ord, chunk, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (gazette_id, secretaria_id, kind, section["title"], despacho_type, despacho_number,
+                     section.get("order"), section.get("chunk"), section.get("data") or None),
+                )
+                section_id = cursor.lastrowid
+                role = section.get("people_role", "people")
+                links += [(section_id, name, role) for name in section.get("people") or [] if name]
+                links += [(section_id, name, "pessoas") for name in section.get("pessoas") or [] if name]
+
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO people(name) VALUES (?)", [(name,) for _, name, _ in links]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO section_people(section_id, person_id, role) "
+                "SELECT ?, id, ? FROM people WHERE name = ?",
+                [(section_id, role, name) for section_id, name, role in links],
+            )
+
+    def update_section_metadata(self, filename: str, kind: str, title: str, data: str | None = None,
+                                autor: list | None = None) -> None:
+        """Updates the date and authors of one section (used by metadata_JSON.py)."""
+        with self.transaction():
+            row = self.conn.execute(
+                "SELECT s.id FROM sections s JOIN gazettes g ON g.id = s.gazette_id "
+                "WHERE g.filename = ? AND s.kind = ? AND s.title = ?",
+                (filename, kind, title),
+            ).fetchone()
+            if row is None:
+                return
+
+            section_id = row["id"]
+            if data is not None:
+                self.conn.execute("UPDATE sections SET data = ? WHERE id = ?", (data or None, section_id))
+            if autor is not None:
+                self.conn.execute("DELETE FROM section_people WHERE section_id = ? AND role = 'autor'", (section_id,))
+                self.conn.executemany("INSERT OR IGNORE INTO people(name) VALUES (?)", [(name,) for name in autor if name])
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO section_people(section_id, person_id, role) "
+                    "SELECT ?, id, 'autor' FROM people WHERE name = ?",
+                    [(section_id, name) for name in autor if name],
+                )
+
+    # --- Queries ---
+
+    def find_sections(self, person: str | None = None, secretaria: str | None = None, number: str | None = None,
+                      date_from: str | None = None, date_to: str | None = None, text: str | None = None,
+                      kind: str | None = None, limit: int = 100) -> list[dict]:
+        """
+        Returns the sections matching every given filter, newest gazettes first.
+
+        Parameters:
+            person (str | None): Name (or part of a name) of a person linked to the section.
+            secretaria (str | None): Part of the secretaria name.
+            number (str | None): Despacho number, e.g. "464/2025".
+            date_from (str | None): Earliest publication date (ISO, inclusive).
+            date_to (str | None): Latest publication date (ISO, inclusive).
+            text (str | None): Full-text query over title and chunk (FTS5 syntax when available).
+            kind (str | None): "sumario" or "body".
+            limit (int): Maximum number of rows.
+
+        Returns:
+            list[dict]: Sections with their gazette, secretaria and people.
+        """
+        joins, where, params = [], [], []
+
+        if person:
+            where.append(
+                "s.id IN (SELECT sp.section_id FROM section_people sp JOIN people p ON p.id = sp.person_id "
+                "WHERE p.name LIKE ?)"
+            )
+            params.append(f"%{person}%")
+        if secretaria:
+            where.append("sec.name LIKE ?")
+            params.append(f"%{secretaria}%")
+        if number:
+            where.append("s.despacho_number = ?")
+            params.append(number)
+        if date_from:
+            where.append("g.gazette_date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("g.gazette_date <= ?")
+            params.append(date_to + "\uffff")  # Inclusive, also of a partial date such as "2025-05"
+        if kind:
+            where.append("s.kind = ?")
+            params.append(kind)
+        if text:
+            if self.has_fts:
+                joins.append("JOIN sections_fts ON sections_fts.rowid = s.id")
+                where.append("sections_fts MATCH ?")
+            else:
+                where.append("(s.title LIKE ? OR s.chunk LIKE ?)")
+                params.append(f"%{text}%")
+                text = f"%{text}%"
+            params.append(text)
+
+        sql = (
+            "SELECT s.id, g.filename, g.file_date, g.gazette_date, sec.name AS secretaria, s.kind, s.title, "
+            "s.despacho_type, s.despacho_number, s.ord, s.data, s.chunk "
+            "FROM sections s JOIN gazettes g ON g.id = s.gazette_id "
+            "LEFT JOIN secretarias sec ON sec.id = s.secretaria_id "
+            + " ".join(joins)
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY g.gazette_date DESC, g.filename, s.ord LIMIT ?"
+        )
+        rows = [dict(row) for row in self.conn.execute(sql, params + [limit])]
+
+        for row in rows:
+            row["people"] = [
+                (person_row["name"], person_row["role"])
+                for person_row in self.conn.execute(
+                    "SELECT p.name, sp.role FROM section_people sp JOIN people p ON p.id = sp.person_id "
+                    "WHERE sp.section_id = ? ORDER BY sp.role, p.name",
+                    (row["id"],),
+                )
+            ]
+        return rows
+
+
+def import_json_exports(store: SectionStore, export_dirs: dict = JSON_EXPORT_DIRS) -> int:
+    """
+    Loads the existing JSON section exports into the store, one transaction per gazette.
+
+    Parameters:
+        store (SectionStore): Target store.
+        export_dirs (dict): Directory of JSON exports -> section kind.
+
+    Returns:
+        int: Number of gazettes imported.
+    """
+    imported = 0
+    for export_dir, kind in export_dirs.items():
+        if not os.path.isdir(export_dir):
+            continue
+
+        for filename in sorted(os.listdir(export_dir)):
+            if not filename.endswith(".json"):
+                continue
+
+            with open(os.path.join(export_dir, filename), "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            sections, file_date = [], None
+            for key, value in data.items():
+                if isinstance(value.get("text"), str):
+                    # raw_json_exports: {despacho: {"text": ..., "people": [...], "order": ..., "file_date": ...}}
+                    file_date = file_date or value.get("file_date")
+                    sections.append({"secretaria": None, "title": key, "chunk": value["text"],
+                                     "order": value.get("order"), "people": value.get("people")})
+                else:
+                    # json_exports: {secretaria: {despacho: {"chunk": ..., "autor": [...], "data": ..., ...}}}
+                    for title, entry in value.items():
+                        sections.append({"secretaria": key, "title": title, "chunk": entry.get("chunk"),
+                                         "order": len(sections) + 1, "data": entry.get("data"),
+                                         "people": entry.get("autor"), "people_role": "autor",
+                                         "pessoas": entry.get("pessoas")})
+
+            store.replace_gazette(os.path.splitext(filename)[0], kind, sections, file_date)
+            imported += 1
+
+    print(f"🗄️ {imported} gazette export(s) imported into: {store.path}")
+    return imported
+
+
+if __name__ == "__main__":
+    # Usage: python section_store.py              -> import json_exports/raw_json_exports
+    #        python section_store.py <fts query>  -> search the section text
+    import sys
+
+    store = SectionStore()
+    if len(sys.argv) == 1:
+        import_json_exports(store)
+    else:
+        for row in store.find_sections(text=" ".join(sys.argv[1:]), limit=20):
+            print(f"{row['gazette_date'] or '?':<12} {row['filename']:<30} {row['title']:<30} {row['secretaria'] or ''}")
+    store.close()
@@ -0,0 +1,319 @@
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from prefilter import MONTHS
+
+# === Config ===
+OUTPUT_TXT_DIR = "synthetic_TXT"
+OUTPUT_PDF_DIR = "synthetic_PDF"
+SEED = 0
+START_DATE = date(2025, 1, 2)
+FIRST_NUMBER = 1
+ENTRIES_PER_GAZETTE = (5, 40)     # Despachos per regular gazette (min, max)
+PARAGRAPHS_PER_ENTRY = (1, 6)     # Body paragraphs per despacho (min, max)
+LINES_PER_PAGE = 60               # Text lines per page (PDF page and page-header rhythm)
+LINE_WIDTH = 95                   # Characters per wrapped line
+
+WEEKDAYS = ["Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"]
+
+SECRETARIAS = [
+    ("SECRETARIA REGIONAL DE EDUCAÇÃO, CIÊNCIA E TECNOLOGIA", "Secretário Regional de Educação, Ciência e Tecnologia"),
+    ("SECRETARIA REGIONAL DE SAÚDE E PROTEÇÃO CIVIL", "Secretário Regional de Saúde e Proteção Civil"),
+    ("SECRETARIA REGIONAL DE FINANÇAS", "Secretário Regional de Finanças"),
+    ("SECRETARIA REGIONAL DE ECONOMIA", "Secretário Regional de Economia"),
+    ("SECRETARIA REGIONAL DE AGRICULTURA, PESCAS E AMBIENTE", "Secretária Regional de Agricultura, Pescas e Ambiente"),
+    ("SECRETARIA REGIONAL DE INCLUSÃO, TRABALHO E JUVENTUDE", "Secretária Regional de Inclusão, Trabalho e Juventude"),
+    ("SECRETARIA REGIONAL DE EQUIPAMENTOS E INFRAESTRUTURAS", "Secretário Regional de Equipamentos e Infraestruturas"),
+    ("VICE-PRESIDÊNCIA DO GOVERNO REGIONAL E DOS ASSUNTOS PARLAMENTARES", "Vice-Presidente do Governo Regional"),
+]
+ENTRY_KINDS = [("Despacho", 0.55), ("Aviso", 0.3), ("Portaria", 0.1), ("Declaração de retificação", 0.05)]
+
+FIRST_NAMES = ["Ana", "Maria", "João", "José", "Rui", "Carla", "Paulo", "Sofia", "Nuno", "Marta", "Pedro", "Rita",
+               "Anabela", "Luís", "Helena", "Duarte", "Filipa", "Ricardo", "Teresa", "Miguel", "Catarina", "Jorge"]
+SURNAMES = ["Silva", "Sousa", "Freitas", "Gonçalves", "Fernandes", "Rodrigues", "Pereira", "Abreu", "Nóbrega",
+            "Câmara", "Escórcio", "Varela", "Reis", "Gomes", "Andrade", "Teixeira", "Jardim", "Vieira", "Pestana",
+            "Mendonça", "Spínola", "Ornelas", "Figueira", "Drumond"]
+PARTICLES = ["de", "da", "do", "dos"]
+TITLES = ["Licenciado", "Licenciada", "Doutor", "Doutora", "Mestre"]
+POSTS = ["Técnica Superior", "Chefe de Divisão", "Diretor de Serviços", "Assistente Técnico", "Coordenadora"]
+UNITS = ["Gabinete de Conferência e Conformidade", "Direção Regional de Planeamento, Recursos e Infraestruturas",
+         "Instituto de Administração da Saúde", "Direção Regional de Educação", "Serviço Regional de Proteção Civil"]
+SUMMARIES = [
+    "Nomeia {person}, {post} do {unit}.",
+    "Autoriza a renovação da comissão de serviço de {person}, como {post} do {unit}.",
+    "Designa {person} para exercer funções de {post} no {unit}.",
+    "Delega competências em {person}, {post} do {unit}.",
+    "Aprova a lista de classificação final do procedimento concursal do {unit}.",
+]
+BODY_SENTENCES = [
+    "Considerando a necessidade de assegurar o regular funcionamento do {unit};",
+    "Nos termos do disposto no artigo {n}.º do Decreto Legislativo Regional n.º {n}/{year}/M, de {day} de {month};",
+    "Considerando que {person} reúne o perfil e a experiência adequados ao exercício do cargo;",
+    "O presente despacho produz efeitos a partir da data da sua publicação.",
+    "A nota curricular de {person} é publicada em anexo ao presente despacho.",
+    "A despesa resultante tem cabimento no orçamento do {unit} para o ano de {year}.",
+]
+
+
+# === Text building ===
+
+def person_name(rng: random.Random) -> str:
+    words = [rng.choice(FIRST_NAMES)]
+    if rng.random() < 0.5:
+        words.append(rng.choice(FIRST_NAMES))
+    for _ in range(rng.randint(1, 3)):
+        if rng.random() < 0.25:
+            words.append(rng.choice(PARTICLES))
+        words.append(rng.choice(SURNAMES))
+    return " ".join(words)
+
+
+def long_date(day: date) -> str:
+    return f"{day.day} de {MONTHS[day.month - 1]} de {day.year}"
+
+
+def wrap(text: str, width: int = LINE_WIDTH) -> list[str]:
+    """Wraps a paragraph into lines of at most width characters, as PDF text comes out."""
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return lines + [line] if line else lines
+
+
+def fill(template: str, rng: random.Random, day: date) -> str:
+    return template.format(
+        person=f"{rng.choice(TITLES)} {person_name(rng)}",
+        post=rng.choice(POSTS),
+        unit=rng.choice(UNITS),
+        n=rng.randint(1, 120),
+        year=day.year - rng.randint(0, 10),
+        day=rng.randint(1, 28),
+        month=rng.choice(MONTHS),
+    )
+
+
+def build_entries(rng: random.Random, day: date, count: int, counters: dict) -> list[dict]:
+    """Builds the despachos of a gazette, grouped by secretaria in the order they are published."""
+    kinds, weights = zip(*ENTRY_KINDS)
+    entries = []
+    for secretaria, signer in sorted(rng.sample(SECRETARIAS, rng.randint(1, len(SECRETARIAS)))):
+        for _ in range(max(1, count // len(SECRETARIAS) + rng.randint(-1, 2))):
+            # The body must open with a despacho or aviso, as SEC_DES_SUM expects
+            kind = rng.choices(kinds, weights)[0] if entries else rng.choice(["Despacho", "Aviso"])
+            counters[kind] = counters.get(kind, 0) + 1
+            paragraphs = [fill(rng.choice(BODY_SENTENCES), rng, day) for _ in range(rng.randint(*PARAGRAPHS_PER_ENTRY))]
+            entries.append({
+                "secretaria": secretaria,
+                "title": f"{kind} n.º {counters[kind]}/{day.year}",
+                "summary": fill(rng.choice(SUMMARIES), rng, day),
+                "paragraphs": paragraphs,
+                "signature": [f"Funchal, {long_date(day - timedelta(days=rng.randint(1, 10)))}.",
+                              f"O {signer}, {person_name(rng)}"],
+            })
+    return entries
+
+
+def build_gazette_lines(number: int, day: date, entries: list[dict]) -> list[str]:
+    """Returns the lines of a gazette: title block and sumário, then every despacho."""
+    lines = [
+        "REGIÃO AUTÓNOMA DA MADEIRA",
+        "JORNAL OFICIAL",
+        f"{WEEKDAYS[day.weekday()]}, {long_date(day)}",
+        "II",
+        "Série",
+        f"Número {number}",
+        "",
+        "Sumário",
+    ]
+    current = None
+    for entry in entries:
+        if entry["secretaria"] != current:
+            current = entry["secretaria"]
+            lines.append(current)
+        lines.append(entry["title"])
+        lines += wrap(entry["summary"])
+
+    current = None
+    for entry in entries:
+        if entry["secretaria"] != current:
+            current = entry["secretaria"]
+            lines.append(current)
+        lines += [entry["title"], "", "Sumário:"] + wrap(entry["summary"]) + ["", "Texto:"]
+        for paragraph in entry["paragraphs"]:
+            lines += wrap(paragraph) + [""]
+        lines += entry["signature"] + [""]
+    return lines
+
+
+def paginate(number: int, day: date, lines: list[str], lines_per_page: int = LINES_PER_PAGE) -> list[str]:
+    """
+    Splits a gazette into page texts. Every page after the first starts with the running header
+    the HEADER_DATE rulers match ("2 - S 4 de junho de 2025 / Número 100" on even pages,
+    "4 de junho de 2025 S - 3 / Número 100" on odd ones), and the last page holds the
+    CORRESPONDÊNCIA block.
+    """
+    pages = ["\n".join(lines[:lines_per_page])]
+    for start in range(lines_per_page, len(lines), lines_per_page):
+        page_number = len(pages) + 1
+        if page_number % 2 == 0:
+            header = [f"{page_number} - S {long_date(day)}", f"Número {number}"]
+        else:
+            header = [f"{long_date(day)} S - {page_number}", f"Número {number}"]
+        pages.append("\n".join(header + lines[start:start + lines_per_page]))
+
+    last = len(pages) + 1
+    pages.append("\n".join([
+        f"{last} - S {long_date(day)}", f"Número {number}", "CORRESPONDÊNCIA",
+        "Toda a correspondência relativa a anúncios e a assinaturas do Jornal Oficial deve ser dirigida",
+        "à Direção Regional do Património.",
+    ]))
+    return pages
+
+
+def generate_gazette(number: int, day: date, entries: int | None = None, min_pages: int = 0,
+                     seed: int = SEED) -> list[str]:
+    """
+    Generates the pages of one synthetic II Série gazette, reproducibly for a (seed, number) pair.
+
+    Parameters:
+        number (int): Gazette number.
+        day (date): Publication date.
+        entries (int | None): Number of despachos; random within ENTRIES_PER_GAZETTE by default.
+        min_pages (int): Keep adding despachos until the gazette has at least this many pages (supplements).
+        seed (int): Corpus seed.
+
+    Returns:
+        list[str]: The text of each page.
+    """
+    rng = random.Random(f"{seed}-{number}")
+    counters = {}
+    all_entries = build_entries(rng, day, entries or rng.randint(*ENTRIES_PER_GAZETTE), counters)
+    lines = build_gazette_lines(number, day, all_entries)
+
+    # Supplements: add the despachos the current lines-per-despacho rate says are missing,
+    # so a 1000-page gazette is rebuilt only a few times
+    target_lines = (min_pages - 1) * LINES_PER_PAGE
+    while len(lines) < target_lines:
+        missing = (target_lines - len(lines)) * len(all_entries) // len(lines) + 1
+        all_entries += build_entries(rng, day, missing, counters)
+        lines = build_gazette_lines(number, day, all_entries)
+
+    return paginate(number, day, lines)
+
+
+# === Writers ===
+
+def write_txt(pages: list[str], path: str) -> None:
+    """Writes the pages joined by newlines, as PDF_to_TXT.extract_pdf_to_txt does."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page)
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _pdf_string(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def write_pdf(pages: list[str], path: str) -> None:
+    """
+    Writes a minimal text-only PDF: one Helvetica (WinAnsiEncoding) line per text line, page by page,
+    streamed to disk so 1000-page supplements never sit in memory as a whole document.
+    """
+    # Object ids: 1 catalog, 2 page tree, 3 font, then (page, content stream) pairs
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    offsets = {}
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        def write_object(object_id: int, body: bytes) -> None:
+            offsets[object_id] = f.tell()
+            f.write(f"{object_id} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode("ascii"))
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        for page_id, page in zip(page_ids, pages):
+            lines = [b"BT", b"/F1 9 Tf", b"11 TL", b"40 800 Td"]
+            lines += [_pdf_string(line) + b" '" for line in page.split("\n")]
+            lines.append(b"ET")
+            stream = b"\n".join(lines)
+
+            write_object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                                  f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("ascii"))
+            write_object(page_id + 1, f"<< /Length {len(stream)} >>\nstream\n".encode("ascii") + stream + b"\nendstream")
+
+        xref_offset = f.tell()
+        object_count = 3 + 2 * len(pages)
+        f.write(f"xref\n0 {object_count + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for object_id in range(1, object_count + 1):
+            f.write(f"{offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+        f.write(f"trailer\n<< /Size {object_count + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+    os.replace(tmp_path, path)
+
+
+# === Corpus ===
+
+def generate_corpus(count: int, supplement_pages: int = 0, pdf: bool = False, seed: int = SEED,
+                    txt_dir: str = OUTPUT_TXT_DIR, pdf_dir: str = OUTPUT_PDF_DIR) -> None:
+    """
+    Writes count synthetic gazettes, one per working day from START_DATE, named like the real
+    ones ("IISerie-100-2025-06-04.txt"). With supplement_pages, the last one is a supplement
+    ("...Supl") of at least that many pages. Gazettes are generated and written one at a time.
+
+    Parameters:
+        count (int): Number of gazettes.
+        supplement_pages (int): Minimum pages of the final supplement (0 = no supplement).
+        pdf (bool): Also write each gazette as a PDF.
+        seed (int): Corpus seed; the same seed always produces the same corpus.
+        txt_dir (str): Output directory of the TXT files.
+        pdf_dir (str): Output directory of the PDF files.
+    """
+    os.makedirs(txt_dir, exist_ok=True)
+    if pdf:
+        os.makedirs(pdf_dir, exist_ok=True)
+
+    day, pages_total = START_DATE, 0
+    for i in range(count):
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+
+        number = FIRST_NUMBER + i
+        supplement = supplement_pages and i == count - 1
+        pages = generate_gazette(number, day, min_pages=supplement_pages if supplement else 0, seed=seed)
+        name = f"IISerie-{number}-{day.isoformat()}{'Supl' if supplement else ''}"
+
+        write_txt(pages, os.path.join(txt_dir, f"{name}.txt"))
+        if pdf:
+            write_pdf(pages, os.path.join(pdf_dir, f"{name}.pdf"))
+
+        pages_total += len(pages)
+        day += timedelta(days=1)
+        if (i + 1) % 1000 == 0:
+            print(f"🔁 {i + 1} of {count} gazettes generated")
+
+    print(f"✅ {count} synthetic gazette(s), {pages_total} page(s) saved to: {txt_dir}" + (f" and {pdf_dir}" if pdf else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a reproducible corpus of synthetic II Série gazettes.")
+    parser.add_argument("count", nargs="?", type=int, default=10, help="number of gazettes (default: 10)")
+    parser.add_argument("--pdf", action="store_true", help=f"also write each gazette as a PDF to {OUTPUT_PDF_DIR}/")
+    parser.add_argument("--supplement", type=int, default=0, metavar="PAGES",
+                        help="make the last gazette a supplement of at least PAGES pages")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"corpus seed (default: {SEED})")
+    args = parser.parse_args()
+
+    generate_corpus(args.count, supplement_pages=args.supplement, pdf=args.pdf, seed=args.seed)